@@ -100,8 +100,11 @@ You are an expert Assistant. Your role is to manage Jira Tickets and search star
             elif event.type == Stream.CONTENT_CHUNK:
                 print(f"CONTENT_CHUNK: {RunnerStream.data_dump(event)}")
 
-            elif event.type == Stream.TOOL_CALLS:
-                print(f"TOOL_CALLS: {RunnerStream.data_dump(event)}")
+            elif event.type == Stream.TOOL_CALL_START:
+                print(f"TOOL_CALL_START: {RunnerStream.data_dump(event)}")
+
+            elif event.type == Stream.TOOL_CALL_DELTA:
+                print(f"TOOL_CALL_DELTA: {RunnerStream.data_dump(event)}")
 
             elif event.type == Stream.TOOL_RESPONSE:
                 print(f"TOOL_RESPONSE: {RunnerStream.data_dump(event)}")
@@ -1,4 +1,5 @@
 from .agent import Agent
+from .cache import BaseCache, InMemoryCache, SQLiteCache
 from .runner import Runner, RunnerStream
 from .tool import stark_tool
 from .type import (
@@ -8,6 +9,9 @@ from .util import Util
 
 __all__ = [
     "Agent",
+    "BaseCache",
+    "InMemoryCache",
+    "SQLiteCache",
     "Runner",
     "RunnerStream",
     "stark_tool",
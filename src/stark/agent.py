@@ -1,74 +1,53 @@
-from typing import Any, Dict, List, Optional, Callable
-from .llm_providers import OPENAI
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Dict, List, Optional, Callable, Tuple
+from .llm_providers import OPENAI, ANTHROPIC
+from .cache import BaseCache
 
+@dataclass(slots=True, eq=False)
 class Agent():
-    def __init__(self,
-        name: str,
-        instructions: str,
-        model: str,
-        description: str = "",
-        mcp_servers: Optional[Dict[str, Any]] = [],
-        function_tools: Optional[List[Callable]] = [],
-        enable_web_search: Optional[bool] = False,
-        sub_agents: Optional[List['Agent']] = [],
-        parallel_tool_calls: Optional[bool] = None,
-        llm_provider: Optional[str] = OPENAI,
-        max_iterations: Optional[int] = 10,
-        max_output_tokens: Optional[int] = None,
-        trace_id: Optional[str] = None
-    ):
-        self.name = name
-        self.instructions = instructions
-        self.model = model
-        self.description = description
-        self.mcp_servers = mcp_servers
-        self.function_tools = function_tools
-        self.enable_web_search = enable_web_search
-        self.sub_agents = sub_agents
-        self.parallel_tool_calls = parallel_tool_calls
-        self.llm_provider = llm_provider
-        self.max_iterations = max_iterations
-        self.max_output_tokens = max_output_tokens
-        self.trace_id = trace_id
+    name: str
+    instructions: str
+    model: str
+    description: str = ""
+    mcp_servers: Dict[str, Any] = field(default_factory=dict)
+    function_tools: List[Callable] = field(default_factory=list)
+    enable_web_search: Optional[bool] = False
+    sub_agents: List['Agent'] = field(default_factory=list)
+    parallel_tool_calls: Optional[bool] = None
+    llm_provider: Optional[str] = OPENAI
+    max_iterations: Optional[int] = 10
+    max_output_tokens: Optional[int] = None
+    trace_id: Optional[str] = None
+    cache: Optional[BaseCache] = None
+    # Tool name (as sent to the LLM) -> seconds its results can be reused for identical arguments
+    tool_ttls: Dict[str, float] = field(default_factory=dict)
+    # None leaves the provider's default. Only requests with temperature 0 are cached, see `BaseCache.cache_sampled`
+    temperature: Optional[float] = None
+    _system_message: Optional[Tuple[str, Dict[str, Any]]] = field(default=None, init=False, repr=False)
 
-    def get_name(self) -> str:
-        return self.name
-    
-    def get_instructions(self) -> str:
-        return self.instructions
-    
-    def get_model(self) -> str:
-        return self.model
-    
-    def get_description(self) -> str:
-        return self.description
-    
-    def get_mcp_servers(self) -> Optional[Dict[str, Any]]:
-        return self.mcp_servers
-    
-    def get_function_tools(self) -> Optional[List[Callable]]:
-        return self.function_tools
-    
-    def get_enable_web_search(self) -> Optional[bool]:
-        return self.enable_web_search
-    
-    def get_sub_agents(self) -> Optional[List['Agent']]:
-        return self.sub_agents
-    
-    def get_parallel_tool_calls(self) -> Optional[bool]:
-        return self.parallel_tool_calls
-    
-    def get_llm_provider(self) -> Optional[str]:
-        return self.llm_provider
-    
-    def get_max_iterations(self) -> Optional[int]:
-        return self.max_iterations
-    
-    def get_max_output_tokens(self) -> Optional[int]:
-        return self.max_output_tokens
-    
-    def get_trace_id(self) -> Optional[str]:
-        return self.trace_id
+    def __post_init__(self):
+        # Copied so agents never share (or alias the caller's) containers, None is accepted as empty
+        self.mcp_servers = dict(self.mcp_servers) if self.mcp_servers else {}
+        self.function_tools = list(self.function_tools) if self.function_tools else []
+        self.sub_agents = list(self.sub_agents) if self.sub_agents else []
+        self.tool_ttls = dict(self.tool_ttls) if self.tool_ttls else {}
+
+    def get_system_message(self) -> Optional[Dict[str, Any]]:
+        """
+        System prompt message, built once per instructions value so every
+        request starts with a byte-identical prefix the provider can cache.
+        """
+        if not self.instructions:
+            return None
+        if self._system_message is None or self._system_message[0] != self.instructions:
+            content: Any = self.instructions
+            if self.llm_provider == ANTHROPIC:
+                content = [{"type": "text", "text": self.instructions, "cache_control": {"type": "ephemeral"}}]
+            self._system_message = (self.instructions, {"role": "system", "content": content})
+        return dict(self._system_message[1])
+
+# Sub-agents take no arguments, every sub-agent tool shares this schema. Treat it as read-only
+_EMPTY_PARAMS: Dict[str, Any] = {"properties": {}, "required": [], "type": "object"}
 
 class SubAgentManager():
     def __init__(self, agents: List[Agent]):
@@ -78,15 +57,12 @@ class SubAgentManager():
     
     def __load_agents_as_tools(self) -> List[Dict]:
         tools = []
-        for agent in self.agents:
+        # Sorted by name so the tool array is identical across runs
+        for agent in sorted(self.agents, key=lambda agent: agent.name):
             toof_def = {
-                "name": "sub_agent__" + agent.get_name(),
-                "description": agent.get_description(),
-                "parameters": {
-                    "properties": {},
-                    "required": [],
-                    "type": "object"
-                }
+                "name": "sub_agent__" + agent.name,
+                "description": agent.description,
+                "parameters": _EMPTY_PARAMS
             }
             tools.append({
                 "type": "function",
@@ -103,8 +79,13 @@ class SubAgentManager():
     def get_agents_as_tools(self) -> List[Dict]:
         return self.tools
 
-    async def execute(self, runner_instance, agent_name, input: List[Dict[str, Any]]):
-        agent = self.agent_name_map[agent_name]
-        input = list(input) # list copy - to avoid deleting tool call from original run response result
-        input.pop()
-        return await runner_instance.run_sub_agent(agent, input)
\ No newline at end of file
+    def batch_runs(self, runner_instance, agent_names: List[str], input: List[Dict[str, Any]]) -> List[Awaitable[Any]]:
+        """
+        Sub-agent runs for every sub-agent call of one iteration, in the order of `agent_names`.
+        """
+        # Sliced once for the whole batch, each sub-agent runner copies it into its own message list
+        history = tuple(input[:-1])
+        return [
+            runner_instance.run_sub_agent(self.agent_name_map[agent_name], history)
+            for agent_name in agent_names
+        ]
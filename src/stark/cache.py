@@ -0,0 +1,111 @@
+import json, hashlib, sqlite3, threading, time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+class BaseCache(ABC):
+    """
+    Content-addressed store for LLM responses.
+    Values are plain JSON-serializable dicts (the provider's `model_dump()`).
+    Only requests with temperature 0 are cached, unless `cache_sampled` is set.
+    """
+    # Also cache sampled requests (temperature unset or above 0), replaying one sampled answer
+    cache_sampled: bool = False
+
+    @classmethod
+    def make_key(cls, model: str, messages: List, tools: List | str, **kwargs) -> str:
+        # Every request option that changes the output is part of the key
+        payload = {"model": model, "messages": messages, "options": kwargs}
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode())
+        # Tools may arrive pre-serialized (see `Tool.get_tools_payload`), don't encode them twice
+        if not isinstance(tools, str):
+            tools = json.dumps(tools, sort_keys=True, default=str)
+        key.update(tools.encode())
+        return key.hexdigest()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        pass
+
+class InMemoryCache(BaseCache):
+    """LRU cache kept in process memory."""
+
+    def __init__(self, max_size: int = 256, cache_sampled: bool = False):
+        self.max_size = max_size
+        self.cache_sampled = cache_sampled
+        self._entries: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+class SQLiteCache(BaseCache):
+    """Persistent cache stored in a SQLite database file."""
+
+    def __init__(self, path: str = ".stark_cache.db", cache_sampled: bool = False):
+        self.path = path
+        self.cache_sampled = cache_sampled
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stark_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM stark_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stark_cache (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, default=str))
+            )
+            self._conn.commit()
+
+class ToolResultCache:
+    """
+    LRU cache of tool results for tools declared cacheable on the Agent.
+    Entries expire after the tool's TTL (seconds).
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    @classmethod
+    def make_key(cls, tool_name: str, arguments: str) -> str:
+        return hashlib.blake2b(f"{tool_name}|{arguments}".encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str, ttl: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -1,5 +1,40 @@
-import json, inspect, asyncio
-from typing import List, Callable, Dict, Any
+import inspect, asyncio, functools
+from typing import List, Callable, Dict, Any, Tuple
+from weakref import WeakKeyDictionary
+from .util import json_loads
+
+# Parsed tool definitions, keyed by the underlying function
+_SCHEMA_CACHE: "WeakKeyDictionary[Callable, Dict]" = WeakKeyDictionary()
+
+def _tool_schema(func: Callable) -> Dict:
+    func = getattr(func, "__func__", func)
+    schema = _SCHEMA_CACHE.get(func)
+    if schema is None:
+        # `stark_tool` already holds the parsed definition, only fall back to parsing the JSON
+        schema = getattr(func, "tool_def", None) or json_loads(func.get_json_schema())
+        _SCHEMA_CACHE[func] = schema
+    # Shallow copy, the caller prefixes the name
+    return dict(schema)
+
+# `stark_tool` methods of each tool class as (name, function), sorted by name
+_CLASS_TOOLS: "WeakKeyDictionary[type, List[Tuple[str, Callable]]]" = WeakKeyDictionary()
+
+def _class_tools(cls: type) -> List[Tuple[str, Callable]]:
+    class_tools = _CLASS_TOOLS.get(cls)
+    if class_tools is None:
+        # Reads class dicts directly, subclasses override bases like normal attribute lookup
+        members: Dict[str, Any] = {}
+        for klass in reversed(cls.__mro__):
+            members.update(vars(klass))
+        class_tools = []
+        for name in sorted(members):
+            func = members[name]
+            if isinstance(func, staticmethod):
+                func = func.__func__
+            if inspect.isfunction(func) and hasattr(func, 'get_json_schema'):
+                class_tools.append((name, func))
+        _CLASS_TOOLS[cls] = class_tools
+    return class_tools
 
 class FunctionToolManager:
     def __init__(self, function_tools: List[Callable]):
@@ -10,12 +45,12 @@ class FunctionToolManager:
     def __is_instance(self, obj):
         # Returns True for instances of user-defined classes
         # Returns False for built-in types (int, list, str, function, etc.) or classes themselves
-        return hasattr(obj, '__dict__') and not isinstance(obj, type)
+        return hasattr(obj, '__dict__') and not isinstance(obj, type) and not inspect.isroutine(obj)
 
     def __load_tools(self) -> List[Dict]:
         tools = []
-        class_instance = None
         for function_tool in self.function_tools:
+            class_instance = None
             if self.__is_instance(function_tool):
                 class_instance = function_tool
                 function_tool = function_tool.__class__
@@ -24,24 +59,22 @@ class FunctionToolManager:
                 if not class_instance:
                     class_instance = function_tool()
                 class_name = function_tool.__name__
-                methods_list = inspect.getmembers(function_tool, inspect.isfunction)
-                for name, func in methods_list:
-                    if hasattr(func, 'get_json_schema'):
-                        tool_func_def = json.loads(func.get_json_schema())
-                        tool_func_def["name"] = class_name + "___" + tool_func_def["name"]
-                        tools.append({
-                            "type": "function",
-                            "function": tool_func_def
-                        })
-                        self.func_name_map[tool_func_def["name"]] = {
-                            "type": "class_instance",
-                            "function_name": name,
-                            "class_instance": class_instance
-                        }
+                for name, func in _class_tools(function_tool):
+                    tool_func_def = _tool_schema(func)
+                    tool_func_def["name"] = class_name + "___" + tool_func_def["name"]
+                    tools.append({
+                        "type": "function",
+                        "function": tool_func_def
+                    })
+                    self.func_name_map[tool_func_def["name"]] = {
+                        "type": "class_instance",
+                        "function_name": name,
+                        "class_instance": class_instance
+                    }
 
             if (inspect.isfunction(function_tool) or inspect.ismethod(function_tool)) and callable(function_tool):
                 if hasattr(function_tool, 'get_json_schema'):
-                    tool_func_def = json.loads(function_tool.get_json_schema())
+                    tool_func_def = _tool_schema(function_tool)
                     tool_func_def["name"] = "st___" + tool_func_def["name"]
                     tools.append({
                         "type": "function",
@@ -56,7 +89,7 @@ class FunctionToolManager:
     def get_tools(self) -> List[Dict]:
         return self.tools
 
-    def call_tool(self, tool_name: str, arguments: Any):
+    async def call_tool_async(self, tool_name: str, arguments: Any):
         tool_details = self.func_name_map.get(tool_name, None)
         tool_func = None
         if tool_details:
@@ -69,8 +102,11 @@ class FunctionToolManager:
             
             if tool_func:
                 if inspect.iscoroutinefunction(tool_func):
-                    return asyncio.run(tool_func(**arguments))
-                return tool_func(**arguments)
+                    return await tool_func(**arguments)
+                # Sync tools run in the default executor so they don't block the event loop
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(tool_func, **arguments)
+                )
         
         return "Tool call didn't happen"
     
@@ -1,6 +1,14 @@
+from typing import Dict
 from .llm_providers.litellm import LiteLLM
-from .llm_providers.provider import LLMProvider
+from .llm_providers.openai import OpenAIProvider
+from .llm_providers.provider import LLMProvider, OPENAI
 
+# Providers are stateless after construction, one instance per provider name is reused
+_PROVIDERS: Dict[str, LLMProvider] = {}
 
 def init_llm(provider: str) -> LLMProvider:
-    return LiteLLM(provider)
+    llm = _PROVIDERS.get(provider)
+    if llm is None:
+        # OpenAI is called through its SDK directly, everything else goes through litellm
+        llm = _PROVIDERS[provider] = OpenAIProvider() if provider == OPENAI else LiteLLM(provider)
+    return llm
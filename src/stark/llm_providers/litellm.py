@@ -1,9 +1,26 @@
-import os, litellm
-from typing import List, Dict, Any, AsyncIterator
+import os, asyncio, litellm
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from .provider import LLMProvider, ProviderSream
+from ..cache import BaseCache
 from ..type import ProviderResponse, Stream
 
+_END = object()
+
+async def _next_delta(deltas: AsyncIterator):
+    # A StopAsyncIteration can't travel through a task, the end of the stream is a sentinel instead
+    try:
+        return await deltas.__anext__()
+    except StopAsyncIteration:
+        return _END
+
 class LiteLLM(LLMProvider):
+    # Argument fragments arriving within this window (seconds) are emitted as one TOOL_CALL_DELTA
+    TOOL_CALL_DELTA_INTERVAL: float = 0.05
+    # Content deltas are coalesced into one CONTENT_CHUNK per window or once this many characters are pending
+    CONTENT_FLUSH_INTERVAL: float = 0.025
+    CONTENT_FLUSH_SIZE: int = 8192
+    # Already-buffered chunks don't suspend the stream, hand control back to the loop every N chunks
+    YIELD_EVERY_CHUNKS: int = 8
     def __init__(self, provider):
         self.api_base = os.environ.get("LITELLM_BASE_URL", None)
         self.api_key = os.environ.get("LITELLM_API_KEY", None)
@@ -13,8 +30,15 @@ class LiteLLM(LLMProvider):
         metadata: Dict[str, Any] = {}
         if "trace_id" in kwargs:
             metadata["trace_id"] = kwargs.pop("trace_id")
+        cache: Optional[BaseCache] = kwargs.pop("cache", None)
+
+        cache_key = self._cache_key(cache, model, messages, tools, kwargs)
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return litellm.ModelResponse(**cached)
 
-        return litellm.completion(
+        response = litellm.completion(
             model=(self.provider + "/" + model),
             messages=messages,
             tools=tools,
@@ -23,13 +47,24 @@ class LiteLLM(LLMProvider):
             metadata=metadata,
             **kwargs
         )
+
+        if cache_key:
+            cache.set(cache_key, response.model_dump())
+        return response
     
     async def run_async(self, model: str, messages: List=[], tools: List=[], **kwargs):
         metadata: Dict[str, Any] = {}
         if "trace_id" in kwargs:
             metadata["trace_id"] = kwargs.pop("trace_id")
+        cache: Optional[BaseCache] = kwargs.pop("cache", None)
 
-        return await litellm.acompletion(
+        cache_key = self._cache_key(cache, model, messages, tools, kwargs)
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return litellm.ModelResponse(**cached)
+
+        response = await litellm.acompletion(
             model=(self.provider + "/" + model),
             messages=messages,
             tools=tools,
@@ -40,10 +75,17 @@ class LiteLLM(LLMProvider):
             **kwargs
         )
 
+        if cache_key:
+            cache.set(cache_key, response.model_dump())
+        return response
+
     async def run_stream(self, model: str, messages: List=[], tools: List=[], **kwargs):
         metadata: Dict[str, Any] = {}
         if "trace_id" in kwargs:
             metadata["trace_id"] = kwargs.pop("trace_id")
+        # Streamed responses are never cached
+        kwargs.pop("cache", None)
+        kwargs.pop("tools_payload", None)
 
         return await litellm.acompletion(
             model=(self.provider + "/" + model),
@@ -59,26 +101,23 @@ class LiteLLM(LLMProvider):
     def response(self, response) -> ProviderResponse:
         provider_response = ProviderResponse(content="", tool_calls=[], message={"role": "assistant"})
 
-        if hasattr(response, "choices") and len(response.choices) > 0:
-            res = response.choices[0].message
-
-            if hasattr(res, "content") and res.content:
-                provider_response.content += res.content
-
-            if hasattr(res, "tool_calls") and res.tool_calls:
-                for tool_call in res.tool_calls:
-                    provider_response.tool_calls.append({
-                        "id": tool_call.id,
-                        "type": "function",
-                        "function": {
-                            "name": tool_call.function.name
-                            if hasattr(tool_call.function, "name")
-                            else "",
-                            "arguments": tool_call.function.arguments
-                            if hasattr(tool_call.function, "arguments")
-                            else "",
-                        },
-                    })
+        choices = getattr(response, "choices", None)
+        if choices:
+            res = choices[0].message
+
+            content = getattr(res, "content", None)
+            if content:
+                provider_response.content += content
+
+            for tool_call in getattr(res, "tool_calls", None) or ():
+                provider_response.tool_calls.append({
+                    "id": tool_call.id,
+                    "type": "function",
+                    "function": {
+                        "name": getattr(tool_call.function, "name", ""),
+                        "arguments": getattr(tool_call.function, "arguments", ""),
+                    },
+                })
 
         if provider_response.content:
             provider_response.message["content"] = provider_response.content
@@ -90,48 +129,156 @@ class LiteLLM(LLMProvider):
     
     async def stream_response(self, response)  -> AsyncIterator[Stream.Event]:
         provider_response = ProviderResponse(content="", tool_calls=[], message={"role": "assistant"})
+        tool_calls = provider_response.tool_calls
+        # Fragments are joined once at the end, `+=` on str would copy the whole text per chunk
+        content_parts: List[str] = []
+        arguments_parts: List[List[str]] = []
+        pending_arguments: Dict[int, List[str]] = {}
+        pending_content: List[str] = []
+        pending_content_size = 0
+        loop = asyncio.get_running_loop()
+        # The first content fragment goes out immediately, only later ones wait for the window
+        last_delta_at = last_content_at = float("-inf")
 
-        async for chunk in response:
-            if hasattr(chunk, "choices") and len(chunk.choices) > 0:
-                delta = chunk.choices[0].delta
-
-                if hasattr(delta, "content") and delta.content:
-                    provider_response.content += delta.content
-                    yield ProviderSream.content_chunk(delta.content)
-
-                if hasattr(delta, "tool_calls") and delta.tool_calls:
-                    for tool_call in delta.tool_calls:
-                        if tool_call.index >= len(provider_response.tool_calls):
-                            provider_response.tool_calls.append({
-                                "id": tool_call.id,
+        deltas = self._deltas(response).__aiter__()
+        next_delta: Optional[asyncio.Future] = None
+        chunks_since_yield = 0
+        try:
+            while True:
+                deadline = None
+                if pending_content:
+                    deadline = last_content_at + self.CONTENT_FLUSH_INTERVAL
+                if pending_arguments:
+                    arguments_deadline = last_delta_at + self.TOOL_CALL_DELTA_INTERVAL
+                    deadline = arguments_deadline if deadline is None else min(deadline, arguments_deadline)
+
+                if deadline is None and next_delta is None:
+                    delta = await _next_delta(deltas)
+                else:
+                    # Something is held back, it goes out when its window closes even if the model pauses.
+                    # The read keeps running across flushes, the generator allows only one at a time
+                    if next_delta is None:
+                        next_delta = asyncio.ensure_future(_next_delta(deltas))
+                    timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                    done, _ = await asyncio.wait((next_delta,), timeout=timeout)
+                    if not done:
+                        now = loop.time()
+                        if pending_content and now >= last_content_at + self.CONTENT_FLUSH_INTERVAL:
+                            yield ProviderSream.content_chunk("".join(pending_content))
+                            pending_content.clear()
+                            pending_content_size = 0
+                            last_content_at = now
+                        if pending_arguments and now >= last_delta_at + self.TOOL_CALL_DELTA_INTERVAL:
+                            for event in self.__flush_tool_call_deltas(pending_arguments):
+                                yield event
+                            last_delta_at = now
+                        continue
+                    delta, next_delta = next_delta.result(), None
+                if delta is _END:
+                    break
+                content, delta_tool_calls = delta
+
+                chunks_since_yield += 1
+                if chunks_since_yield >= self.YIELD_EVERY_CHUNKS:
+                    chunks_since_yield = 0
+                    await asyncio.sleep(0)
+
+                if content:
+                    content_parts.append(content)
+                    pending_content.append(content)
+                    pending_content_size += len(content)
+                    now = loop.time()
+                    if pending_content_size >= self.CONTENT_FLUSH_SIZE or now - last_content_at >= self.CONTENT_FLUSH_INTERVAL:
+                        yield ProviderSream.content_chunk("".join(pending_content))
+                        pending_content.clear()
+                        pending_content_size = 0
+                        last_content_at = now
+
+                if delta_tool_calls:
+                    for index, tool_call_id, name, arguments in delta_tool_calls:
+                        if index >= len(tool_calls):
+                            # Pending text and fragments of the previous call go out before the next call starts
+                            if pending_content:
+                                yield ProviderSream.content_chunk("".join(pending_content))
+                                pending_content.clear()
+                                pending_content_size = 0
+                            for event in self.__flush_tool_call_deltas(pending_arguments):
+                                yield event
+                            # The call skeleton is built once, arguments are filled in after the stream ends
+                            tool_calls.append({
+                                "id": tool_call_id,
                                 "type": "function",
                                 "function": {
-                                    "name": tool_call.function.name
-                                    if hasattr(tool_call.function, "name")
-                                    else "",
-                                    "arguments": tool_call.function.arguments
-                                    if hasattr(tool_call.function, "arguments")
-                                    else "",
+                                    "name": name,
+                                    "arguments": "",
                                 },
                             })
-                        else:
-                            if hasattr(tool_call.function, "arguments"):
-                                provider_response.tool_calls[tool_call.index]["function"][
-                                    "arguments"
-                                ] += tool_call.function.arguments
-                    
-                    # Yield tool calls update
-                    yield ProviderSream.tool_calls(provider_response.tool_calls)
+                            arguments_parts.append([])
+                            yield ProviderSream.tool_call_start({"index": index, "id": tool_call_id, "name": name})
+
+                        # Only new argument fragments are emitted, consumers accumulate them per index
+                        if arguments:
+                            arguments_parts[index].append(arguments)
+                            pending_arguments.setdefault(index, []).append(arguments)
+
+                    now = loop.time()
+                    if pending_arguments and now - last_delta_at >= self.TOOL_CALL_DELTA_INTERVAL:
+                        for event in self.__flush_tool_call_deltas(pending_arguments):
+                            yield event
+                        last_delta_at = now
+        finally:
+            # Closed early, don't leave a read of the provider stream pending
+            if next_delta is not None and not next_delta.done():
+                next_delta.cancel()
+
+        if pending_content:
+            yield ProviderSream.content_chunk("".join(pending_content))
+        for event in self.__flush_tool_call_deltas(pending_arguments):
+            yield event
+
+        provider_response.content = "".join(content_parts)
+        for tool_call, parts in zip(tool_calls, arguments_parts):
+            tool_call["function"]["arguments"] = "".join(parts)
 
         # Only add content if there is actual content
         if provider_response.content:
             provider_response.message["content"] = provider_response.content
 
         # Add tool calls if present
-        if provider_response.tool_calls:
-            provider_response.message["tool_calls"] = provider_response.tool_calls
+        if tool_calls:
+            provider_response.message["tool_calls"] = tool_calls
+            # Assembled tool calls are emitted once, not on every delta
+            yield ProviderSream.tool_calls(tool_calls)
 
         # Yield final complete response
         yield ProviderSream.provider_stream_completed(provider_response)
 
-    
+    async def _deltas(self, response) -> AsyncIterator[Tuple[Optional[str], Optional[List[Tuple[int, Optional[str], Optional[str], Optional[str]]]]]]:
+        """
+        Reduces stream chunks to `(content, tool_calls)`, each tool call delta
+        as `(index, id, name, arguments)`. Chunks without choices are skipped.
+        """
+        async for chunk in response:
+            choices = getattr(chunk, "choices", None)
+            if not choices:
+                continue
+            delta = choices[0].delta
+            delta_tool_calls = getattr(delta, "tool_calls", None)
+            if delta_tool_calls:
+                delta_tool_calls = [
+                    (
+                        tool_call.index, tool_call.id,
+                        getattr(tool_call.function, "name", ""), getattr(tool_call.function, "arguments", None)
+                    )
+                    for tool_call in delta_tool_calls
+                ]
+            yield getattr(delta, "content", None), delta_tool_calls
+
+    @classmethod
+    def __flush_tool_call_deltas(cls, pending_arguments: Dict[int, List[str]]) -> List[Stream.Event]:
+        events = [
+            ProviderSream.tool_call_delta({"index": index, "arguments_delta": "".join(parts)})
+            for index, parts in pending_arguments.items()
+        ]
+        pending_arguments.clear()
+        return events
@@ -0,0 +1,175 @@
+import asyncio, logging, openai
+from typing import List, Dict, Any, Optional
+from openai.types.chat import ChatCompletion
+from pydantic import ValidationError
+from .litellm import LiteLLM
+from .provider import OPENAI
+from ..cache import BaseCache
+from ..util import json_loads
+
+logger = logging.getLogger(__name__)
+
+class OpenAIProvider(LiteLLM):
+    """
+    Calls the OpenAI SDK directly instead of going through litellm's request
+    pipeline. Responses have the same shape, so parsing is inherited from LiteLLM.
+    Requests with non-function tools (e.g. web search) still go through litellm.
+    Streams are read as raw SSE and decoded straight to dicts.
+    """
+
+    def __init__(self):
+        super().__init__(OPENAI)
+        self._client: Optional[openai.OpenAI] = None
+        # The async client's connection pool belongs to the loop it was created on
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __client(self) -> openai.OpenAI:
+        if self._client is None:
+            self._client = openai.OpenAI(base_url=self.api_base, api_key=self.api_key)
+        return self._client
+
+    def __aclient(self) -> openai.AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = openai.AsyncOpenAI(base_url=self.api_base, api_key=self.api_key)
+            self._async_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def __is_native(tools: List) -> bool:
+        return all(tool.get("type") == "function" for tool in tools)
+
+    @staticmethod
+    def __uses_max_completion_tokens(model: str) -> bool:
+        # Same families litellm maps for, o-series and gpt-5 models reject max_tokens
+        model = model.split("/")[-1]
+        return model.startswith(("o1", "o3", "o4")) or "gpt-5" in model
+
+    def __request(self, model: str, messages: List, tools: List, kwargs: Dict, trace_id: Optional[str] = None) -> Dict[str, Any]:
+        request: Dict[str, Any] = {"model": model, "messages": messages}
+        if "max_tokens" in kwargs and self.__uses_max_completion_tokens(model):
+            kwargs["max_completion_tokens"] = kwargs.pop("max_tokens")
+        if trace_id and self.api_base:
+            # A LiteLLM proxy picks the trace id up from the request metadata
+            request["extra_body"] = {"metadata": {"trace_id": trace_id}}
+        if tools:
+            request["tools"] = tools
+        else:
+            # The API rejects parallel_tool_calls without tools
+            kwargs.pop("parallel_tool_calls", None)
+        # Unset options are omitted rather than sent as null
+        request.update({key: value for key, value in kwargs.items() if value is not None})
+        return request
+
+    @staticmethod
+    def __cached(cache: BaseCache, cache_key: str) -> Optional[ChatCompletion]:
+        cached = cache.get(cache_key)
+        if cached is None:
+            return None
+        try:
+            return ChatCompletion.model_validate(cached)
+        except ValidationError as e:
+            logger.warning("Ignoring unreadable cached response: %s", e)
+            return None
+
+    def run(self, model: str, messages: List=[], tools: List=[], **kwargs):
+        if not self.__is_native(tools):
+            return super().run(model, messages, tools, **kwargs)
+        cache: Optional[BaseCache] = kwargs.pop("cache", None)
+        # Metadata only, popped first so it never becomes part of the cache key
+        trace_id = kwargs.pop("trace_id", None)
+
+        cache_key = self._cache_key(cache, model, messages, tools, kwargs)
+        if cache_key:
+            cached = self.__cached(cache, cache_key)
+            if cached is not None:
+                return cached
+
+        response = self.__client().chat.completions.create(**self.__request(model, messages, tools, kwargs, trace_id))
+
+        if cache_key:
+            cache.set(cache_key, response.model_dump())
+        return response
+
+    async def run_async(self, model: str, messages: List=[], tools: List=[], **kwargs):
+        if not self.__is_native(tools):
+            return await super().run_async(model, messages, tools, **kwargs)
+        cache: Optional[BaseCache] = kwargs.pop("cache", None)
+        # Metadata only, popped first so it never becomes part of the cache key
+        trace_id = kwargs.pop("trace_id", None)
+
+        cache_key = self._cache_key(cache, model, messages, tools, kwargs)
+        if cache_key:
+            cached = self.__cached(cache, cache_key)
+            if cached is not None:
+                return cached
+
+        response = await self.__aclient().chat.completions.create(**self.__request(model, messages, tools, kwargs, trace_id))
+
+        if cache_key:
+            cache.set(cache_key, response.model_dump())
+        return response
+
+    async def run_stream(self, model: str, messages: List=[], tools: List=[], **kwargs):
+        if not self.__is_native(tools):
+            return await super().run_stream(model, messages, tools, **kwargs)
+        # Streamed responses are never cached
+        kwargs.pop("cache", None)
+        kwargs.pop("tools_payload", None)
+        trace_id = kwargs.pop("trace_id", None)
+
+        # The raw body is read instead of the SDK's chunk models, see `_deltas`
+        stream = self.__aclient().chat.completions.with_streaming_response.create(
+            stream=True, **self.__request(model, messages, tools, kwargs, trace_id)
+        )
+        # Entering sends the request, so HTTP errors are still raised here
+        return _SSEStream(stream, await stream.__aenter__())
+
+    async def _deltas(self, response):
+        if not isinstance(response, _SSEStream):
+            async for delta in super()._deltas(response):
+                yield delta
+            return
+
+        # Plain dict access on the decoded event, no per-chunk model validation
+        async for chunk in response:
+            choices = chunk.get("choices")
+            if not choices:
+                continue
+            delta = choices[0].get("delta") or {}
+            delta_tool_calls = delta.get("tool_calls")
+            if delta_tool_calls:
+                delta_tool_calls = [
+                    (
+                        tool_call["index"], tool_call.get("id"),
+                        (tool_call.get("function") or {}).get("name", ""),
+                        (tool_call.get("function") or {}).get("arguments")
+                    )
+                    for tool_call in delta_tool_calls
+                ]
+            yield delta.get("content"), delta_tool_calls
+
+class _SSEStream:
+    """`data:` events of a raw chat completion stream, decoded to dicts."""
+
+    def __init__(self, stream, response):
+        self._stream = stream
+        self._response = response
+
+    async def __aiter__(self):
+        try:
+            async for line in self._response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json_loads(data)
+                error = chunk.get("error") if isinstance(chunk, dict) else None
+                if error:
+                    message = error.get("message", "An error occurred during streaming") if isinstance(error, dict) else str(error)
+                    raise openai.APIError(message, self._response.http_request, body=error)
+                yield chunk
+        finally:
+            await self._stream.__aexit__(None, None, None)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, AsyncIterator
+from typing import List, Dict, AsyncIterator, Optional
+from ..cache import BaseCache
 from ..type import Stream, ProviderResponse
 
 OPENAI = "openai"
@@ -14,12 +15,29 @@ class ProviderSream:
     @classmethod
     def tool_calls(cls, data: List) -> Stream.Event:
         return Stream.event(type=Stream.TOOL_CALLS, data=data, data_type="List")
+
+    @classmethod
+    def tool_call_start(cls, data: Dict) -> Stream.Event:
+        return Stream.event(type=Stream.TOOL_CALL_START, data=data, data_type="Dict")
+
+    @classmethod
+    def tool_call_delta(cls, data: Dict) -> Stream.Event:
+        return Stream.event(type=Stream.TOOL_CALL_DELTA, data=data, data_type="Dict")
     
     @classmethod
     def provider_stream_completed(cls, data: ProviderResponse) -> Stream.Event:
-        return Stream.event(type=Stream.PROVIDER_STREAM_COMPLETED, data=data, data_type="BaseModel")
+        return Stream.event(type=Stream.PROVIDER_STREAM_COMPLETED, data=data, data_type="ProviderResponse")
 
 class LLMProvider(ABC):
+    provider: str = ""
+
+    def _cache_key(self, cache: Optional[BaseCache], model: str, messages: List, tools: List, kwargs: Dict) -> Optional[str]:
+        tools_payload: Optional[str] = kwargs.pop("tools_payload", None)
+        # Sampled responses are not reproducible, so only temperature 0 requests are cached unless the
+        # cache opts in. No temperature means the provider's default, which samples
+        if cache is None or (kwargs.get("temperature") != 0 and not cache.cache_sampled):
+            return None
+        return cache.make_key(self.provider + "/" + model, messages, tools_payload or tools, **kwargs)
 
     @abstractmethod
     def run(self, messages: List=[], tools: List=[], **kwargs):
@@ -1,5 +1,5 @@
 import shutil
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from contextlib import AsyncExitStack
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -12,8 +12,9 @@ class StdioMCP():
     def __init__(self):
         self.sessions: ClientSession = None
         self._exit_stack = AsyncExitStack()
+        self.tools: Tuple[Dict[str, Any], ...] = ()
 
-    def __format_tools_for_input(self, tools: List[Tool]) -> List:
+    def __format_tools_for_input(self, tools: List[Tool]) -> Tuple[Dict[str, Any], ...]:
         tools_output: List[Any] = []
         for tool in tools:
             tools_output.append({
@@ -26,7 +27,7 @@ class StdioMCP():
                     else {"type": "object", "properties": {}},
                 },
             })
-        return tools_output
+        return tuple(tools_output)
 
     async def connect_server(self, name:str, config: Dict[str, Any], _exit_stack: AsyncExitStack):
         """
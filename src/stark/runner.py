@@ -1,13 +1,17 @@
-import logging, json, asyncio, sys
-from typing import List, Dict, Any
+import logging, asyncio, sys, os, atexit, threading
+from typing import List, Dict, Any, Optional, Callable
 from .agent import Agent
+from .cache import ToolResultCache
 from .llm import init_llm
 from .llm_providers.provider import LLMProvider
 from .tool import Tool
+from .util import json_dumps, buffered
 from .type import (
     Stream, ProviderResponse, RunResponse, ToolCallResponse, IterationData
 )
 
+logger = logging.getLogger(__name__)
+
 class RunnerStream:
 
     @classmethod
@@ -26,63 +30,141 @@ class RunnerStream:
     def agent_run_end(cls, data: RunResponse) -> Stream.Event:
         return Stream.event(type=Stream.AGENT_RUN_END, data=data, data_type="BaseModel")
     
+    # data_type -> serializer, BaseModel payloads are written by pydantic-core in one pass
+    _DUMPERS: Dict[str, Callable[[Any], str]] = {
+        "int": str,
+        "str": lambda data: data if isinstance(data, str) else str(data),
+        "List": json_dumps,
+        "Dict": json_dumps,
+        "BaseModel": lambda data: data.model_dump_json(),
+    }
+
     @classmethod
-    def data_dump(cls, event: Stream.Event) -> str:
-        if event.data_type == "int":
-            return str(event.data)
-        elif event.data_type == "str":
-            return str(event.data)
-        elif event.data_type == "List":
-            return json.dumps(event.data)
-        elif event.data_type == "Dict":
-            return json.dumps(event.data)
-        elif event.data_type == "BaseModel":
-            return json.dumps(event.data.model_dump())
+    def data_dump(cls, event: Stream.Event) -> Optional[str]:
+        dumper = cls._DUMPERS.get(event.data_type)
+        return dumper(event.data) if dumper else None
+
+# One event loop per thread, reused by every synchronous `Runner.run` call
+_loop_runners = threading.local()
+
+def _loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    # uvloop is used whenever it is installed, STARK_USE_UVLOOP=0 opts out. It doesn't support Windows
+    use_uvloop = os.environ.get("STARK_USE_UVLOOP")
+    if use_uvloop == "0" or sys.platform == "win32":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        if use_uvloop == "1":
+            logger.warning("STARK_USE_UVLOOP is set but uvloop is not installed, using the default event loop")
+        return None
+    return uvloop.new_event_loop
+
+def _run_sync(coro):
+    # asyncio.Runner is 3.11+, older versions create a loop per call
+    if not hasattr(asyncio, "Runner"):
+        loop_factory = _loop_factory()
+        if loop_factory is None:
+            return asyncio.run(coro)
+        loop = loop_factory()
+        try:
+            asyncio.set_event_loop(loop)
+            return loop.run_until_complete(coro)
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+    loop_runner = getattr(_loop_runners, "runner", None)
+    if loop_runner is None:
+        loop_runner = _loop_runners.runner = asyncio.Runner(loop_factory=_loop_factory())
+        atexit.register(loop_runner.close)
+    return loop_runner.run(coro)
 
 class Runner():
     def __init__(self,
-        agent: Agent
+        agent: Agent,
+        max_tool_concurrency: Optional[int] = 8
     ):
         self.agent = agent
         self.mcp_manager = None
         self.ft_manager = None
         self.tool = None
+        self._provider: Optional[LLMProvider] = None
         self.is_sub_agent = False
+        # Upper bound on tool calls of one turn running at once, None means unbounded
+        self.max_tool_concurrency = max_tool_concurrency
+        self.tool_semaphore: Optional[asyncio.Semaphore] = None
+        # Results of the agent's cacheable tools, kept across iterations and runs of this runner
+        self.tool_cache = ToolResultCache()
     
-    def __set_agent_instructions(self, messages: List, system_prompt):
-        if not system_prompt:
-            return messages
+    def __init_tool_semaphore(self):
+        # Created inside the run so it belongs to the running event loop
+        if self.max_tool_concurrency:
+            self.tool_semaphore = asyncio.Semaphore(self.max_tool_concurrency)
+
+    def __set_agent_instructions(self, messages: Optional[List], system_prompt_msg: Optional[Dict[str, Any]]) -> List:
+        # Always a new list: the input may be the caller's list or a history shared by sibling sub-agents
+        if messages is None:
+            messages = ()
+        if not system_prompt_msg:
+            return list(messages)
         
-        system_prompt_msg = {"role": "system", "content": system_prompt}
         if not messages or (len(messages) == 1 and messages[0].get("role") != "system"):
-            messages.insert(0, system_prompt_msg)
-        else:
-            messages.append(system_prompt_msg)
-        return messages
+            return [system_prompt_msg, *messages]
+        return [*messages, system_prompt_msg]
 
-    async def __stream_with_events(self, input: List[Dict[str, Any]]):
+    def __request_options(self) -> Dict[str, Any]:
+        # Agent config and tools don't change during a run, collect them once instead of per iteration
+        return {
+            "model": self.agent.model,
+            "tools": self.tool.get_tools(),
+            "tools_payload": self.tool.get_tools_payload(),
+            "parallel_tool_calls": self.agent.parallel_tool_calls,
+            "max_tokens": self.agent.max_output_tokens,
+            "temperature": self.agent.temperature,
+            "trace_id": self.agent.trace_id,
+            "cache": self.agent.cache
+        }
+
+    async def __stream_with_events(self, input: Optional[List[Dict[str, Any]]]):
         """Internal streaming method that yields events"""
-        input = self.__set_agent_instructions(input, self.agent.get_instructions())
-        run_response = RunResponse(result=input, iterations=0)
+        input = self.__set_agent_instructions(input, self.agent.get_system_message())
+        # Built from trusted values, skips re-validating (and copying) the whole message history
+        run_response = RunResponse.model_construct(result=input, iterations=0)
+        provider: LLMProvider = self._provider
+        request_options = self.__request_options()
+        max_iterations = self.agent.max_iterations
+
+        if not request_options["tools"] and max_iterations >= 1:
+            # Without tools the model can't ask for another turn, a single streamed call is the whole run
+            run_response.iterations = 1
+            yield RunnerStream.iteration_start(1)
+
+            response = await provider.run_stream(messages=run_response.result, **request_options)
+            provider_response: ProviderResponse = None
+            async for stream_event in buffered(provider.stream_response(response)):
+                if stream_event.type == Stream.PROVIDER_STREAM_COMPLETED:
+                    provider_response = stream_event.data
+                else:
+                    yield stream_event
+            run_response.result.append(provider_response.message)
+
+            yield RunnerStream.iteration_end(IterationData.model_construct(iterations=1, has_tool_calls=False))
+            await self.tool.close_mcp_manager()
+            run_response.sub_agents_response = self.tool.get_sub_agents_response()
+            yield RunnerStream.agent_run_end(run_response)
+            return
 
-        while run_response.iterations < self.agent.get_max_iterations():
+        while run_response.iterations < max_iterations:
             run_response.iterations += 1
 
             yield RunnerStream.iteration_start(run_response.iterations)
 
-            provider: LLMProvider = init_llm(self.agent.get_llm_provider())
-            response = await provider.run_stream(
-                model=self.agent.get_model(),
-                messages=run_response.result,
-                tools=self.tool.get_tools(),
-                parallel_tool_calls = self.agent.get_parallel_tool_calls(),
-                max_tokens=self.agent.get_max_output_tokens(),
-                trace_id=self.agent.get_trace_id()
-            )
+            response = await provider.run_stream(messages=run_response.result, **request_options)
 
             # Consume the stream and emit events for clients
             provider_response: ProviderResponse = None
-            async for stream_event in provider.stream_response(response):
+            # Buffered so the provider stream keeps being read while the caller handles earlier events
+            async for stream_event in buffered(provider.stream_response(response)):
                 if stream_event.type == Stream.PROVIDER_STREAM_COMPLETED:
                     provider_response = stream_event.data
                 else:
@@ -91,18 +173,18 @@ class Runner():
             # Append the complete message to result
             run_response.result.append(provider_response.message)
 
-            iteration_data = IterationData(
+            iteration_data = IterationData.model_construct(
                 iterations=run_response.iterations,
                 has_tool_calls=bool(provider_response.tool_calls)
             )
 
-            logging.info(
-                f"Iteration {run_response.iterations}: Received response - "
-                f"content length: {len(provider_response.content)} chars, tool_calls: {len(provider_response.tool_calls)}"
+            logger.info(
+                "Iteration %d: Received response - content length: %d chars, tool_calls: %d",
+                run_response.iterations, len(provider_response.content), len(provider_response.tool_calls)
             )
 
             if not provider_response.tool_calls:
-                logging.info(f"No tool calls made. Agent finished after {run_response.iterations} iterations.")
+                logger.info("No tool calls made. Agent finished after %d iterations.", run_response.iterations)
                 # Yield agent finished event
                 yield RunnerStream.iteration_end(iteration_data)
                 await self.tool.close_mcp_manager()
@@ -110,15 +192,18 @@ class Runner():
                 yield RunnerStream.agent_run_end(run_response)
                 return
 
-            tool_responses: List[ToolCallResponse] = await self.tool.tool_calls(
+            # Each tool response is emitted as soon as its call finishes
+            tool_responses: List[Optional[ToolCallResponse]] = [None] * len(provider_response.tool_calls)
+            async for index, tool_response in self.tool.tool_calls_stream(
                 provider_response.tool_calls, run_response.result
-            )
-
-            for tool_response in tool_responses:
-                run_response.result.append(tool_response.model_dump())
+            ):
+                tool_responses[index] = tool_response
                 # Yield tool response event
                 yield RunnerStream.tool_response(tool_response)
 
+            # The history keeps the order the model requested the calls in
+            run_response.result.extend(tool_response.to_message() for tool_response in tool_responses)
+
             # Yield iteration end event
             yield RunnerStream.iteration_end(iteration_data)
 
@@ -128,35 +213,48 @@ class Runner():
         run_response.max_iterations_reached = True
         yield RunnerStream.agent_run_end(run_response)
 
-    async def run_stream(self, input: List[Dict[str, Any]] = [{}]):
+    async def run_stream(self, input: Optional[List[Dict[str, Any]]] = None):
         try:
-            self.tool = await Tool(self).init_tools(self.agent)
+            self.__init_tool_semaphore()
+            # Assigned before init so a partially initialized tool set is still cleaned up
+            self.tool = Tool(self)
+            await self.tool.init_tools(self.agent)
+            self._provider = init_llm(self.agent.llm_provider)
             async for event in self.__stream_with_events(input):
                 yield event
-        except Exception as e:
+        finally:
+            # No-op when the stream already closed the sessions before its final event
             if self.tool:
                 await self.tool.close_mcp_manager()
-            raise
 
-    async def __execute(self, input: List[Dict[str, Any]]):
-        input = self.__set_agent_instructions(input, self.agent.get_instructions())
-        run_response = RunResponse(result=input, iterations=0)
+    async def __execute(self, input: Optional[List[Dict[str, Any]]]):
+        system_message = self.agent.get_system_message()
+        input = self.__set_agent_instructions(input, system_message)
+        # Built from trusted values, skips re-validating (and copying) the whole message history
+        run_response = RunResponse.model_construct(result=input, iterations=0)
         # If sub agent, get the last index value of the input. It will be the system prompt in any way.
-        if self.is_sub_agent and self.agent.get_instructions():
+        if self.is_sub_agent and system_message:
             run_response.sub_agent_result.append(input[-1])
+        provider: LLMProvider = self._provider
+        request_options = self.__request_options()
+        max_iterations = self.agent.max_iterations
 
-        while run_response.iterations < self.agent.get_max_iterations():
+        if not request_options["tools"] and max_iterations >= 1:
+            # Without tools the model can't ask for another turn, a single call is the whole run
+            run_response.iterations = 1
+            provider_response: ProviderResponse = provider.response(
+                await provider.run_async(messages=run_response.result, **request_options)
+            )
+            run_response.result.append(provider_response.message)
+            if self.is_sub_agent:
+                run_response.sub_agent_result.append(provider_response.message)
+            return run_response
+
+        while run_response.iterations < max_iterations:
             run_response.iterations += 1
             
-            provider: LLMProvider = init_llm(self.agent.get_llm_provider())
-            llm_response = provider.run(
-                model=self.agent.get_model(),
-                messages=run_response.result,
-                tools=self.tool.get_tools(),
-                parallel_tool_calls = self.agent.get_parallel_tool_calls(),
-                max_tokens=self.agent.get_max_output_tokens(),
-                trace_id=self.agent.get_trace_id()
-            )
+            # Awaited so concurrently running sub-agents don't block each other
+            llm_response = await provider.run_async(messages=run_response.result, **request_options)
 
             provider_response: ProviderResponse = provider.response(llm_response)
             
@@ -169,37 +267,35 @@ class Runner():
                 run_response.sub_agents_response = self.tool.get_sub_agents_response()
                 return run_response
 
-            tool_responses: List[ToolCallResponse] = await self.tool.tool_calls(
+            tool_messages, _ = await self.tool.tool_calls(
                 provider_response.tool_calls, run_response.result
             )
-
-            for tool_response in tool_responses:
-                run_response.result.append(tool_response.model_dump())
+            run_response.result.extend(tool_messages)
 
         run_response.sub_agents_response = self.tool.get_sub_agents_response()
         run_response.max_iterations_reached = True
         return run_response
 
-    async def run_async(self, input: List[Dict[str, Any]]):
+    async def run_async(self, input: Optional[List[Dict[str, Any]]] = None, *, is_sub_agent: bool = False):
         try:
-            # If caller function is 'run_sub_agent', its a sub agent call
-            if (sys._getframe(1).f_code.co_name) == 'run_sub_agent':
-                self.is_sub_agent = True
-            self.tool = await Tool(self).init_tools(self.agent)
-            exec_result = await self.__execute(input)
-            await self.tool.close_mcp_manager()
-            return exec_result
-        except Exception as e:
+            # Sub-agent runs also collect their own messages in `sub_agent_result`
+            self.is_sub_agent = is_sub_agent
+            self.__init_tool_semaphore()
+            # Assigned before init so a partially initialized tool set is still cleaned up
+            self.tool = Tool(self)
+            await self.tool.init_tools(self.agent)
+            self._provider = init_llm(self.agent.llm_provider)
+            return await self.__execute(input)
+        finally:
             if self.tool:
                 await self.tool.close_mcp_manager()
-            raise
 
-    def run(self, input: List[Dict[str, Any]] = [{}]):
+    def run(self, input: Optional[List[Dict[str, Any]]] = None):
         try:
-            return asyncio.run(self.run_async(input))
+            return _run_sync(self.run_async(input))
         except Exception as e:
             raise
 
     @classmethod
-    async def run_sub_agent(cls, agent: Agent, input=[{}]):
-        return await cls(agent).run_async(input=input)
+    async def run_sub_agent(cls, agent: Agent, input=None):
+        return await cls(agent).run_async(input=input, is_sub_agent=True)
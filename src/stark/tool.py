@@ -1,10 +1,54 @@
-import logging, json, inspect, functools
-from typing import List, Dict, Any, get_type_hints, get_origin, get_args
+import logging, json, inspect, functools, asyncio, types, copy
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple, Union, Annotated, get_type_hints, get_origin, get_args
 from .mcp import MCPManager
 from .function import FunctionToolManager
 from .agent import Agent, SubAgentManager
+from .cache import ToolResultCache
 from .type import ToolCallResponse, RunResponse
 from .llm_providers import OPENAI, ANTHROPIC
+from .util import json_loads, json_dumps
+
+logger = logging.getLogger(__name__)
+
+_SCALAR_JSON: Dict[Any, Dict[str, Any]] = {
+    str: {"type": "string"},
+    int: {"type": "integer"},
+    float: {"type": "number"},
+    bool: {"type": "boolean"},
+    dict: {"type": "object"},
+}
+
+# Helper to map python types to JSON schema types. Types repeat across every
+# parameter of every tool, so each one is mapped once
+@functools.lru_cache(maxsize=256)
+def _python_type_to_json_schema(py_type) -> Dict[str, Any]:
+    # Handle basics with one lookup instead of a comparison chain
+    scalar = _SCALAR_JSON.get(py_type) if isinstance(py_type, type) else None
+    if scalar is not None:
+        return scalar
+
+    origin = get_origin(py_type)
+    # Optional[T] / T | None is described as T, a None is only possible when the parameter has a default
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(py_type) if arg is not type(None)]
+        if len(args) == 1:
+            return _type_schema(args[0])
+
+    # Handle Lists (e.g., list[str])
+    if origin is list:
+        args = get_args(py_type)
+        item_schema = _type_schema(args[0]) if args else {}
+        return {"type": "array", "items": item_schema}
+
+    # Fallback for complex/unknown types
+    return {"type": "string"}
+
+def _type_schema(py_type) -> Dict[str, Any]:
+    try:
+        return _python_type_to_json_schema(py_type)
+    except TypeError:
+        # Unhashable annotations (e.g. Annotated with dict metadata) are mapped uncached
+        return _python_type_to_json_schema.__wrapped__(py_type)
 
 def stark_tool(func):
     """
@@ -12,9 +56,15 @@ def stark_tool(func):
     Attaches an 'mcp_def' attribute to the function containing the tool definition.
     """
     
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        return func(*args, **kwargs)
+    if inspect.iscoroutinefunction(func):
+        # Keep coroutine functions awaitable so callers can detect and await them
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await func(*args, **kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
 
     # --- 1. Basic Metadata ---
     tool_name = func.__name__
@@ -22,57 +72,27 @@ def stark_tool(func):
     tool_description = inspect.getdoc(func) or ""
 
     # --- 2. Type Hint Introspection ---
-    type_hints = get_type_hints(func)
     sig = inspect.signature(func)
-    
-    properties = {}
-    required_fields = []
-
-    # Helper to map python types to JSON schema types
-    def python_type_to_json_schema(py_type):
-        # Handle basics
-        if py_type == str:
-            return {"type": "string"}
-        elif py_type == int:
-            return {"type": "integer"}
-        elif py_type == float:
-            return {"type": "number"}
-        elif py_type == bool:
-            return {"type": "boolean"}
-        elif py_type == dict:
-            return {"type": "object"}
-        
-        # Handle Lists (e.g., list[str])
-        origin = get_origin(py_type)
-        if origin is list:
-            args = get_args(py_type)
-            item_schema = python_type_to_json_schema(args[0]) if args else {}
-            return {"type": "array", "items": item_schema}
-            
-        # Fallback for complex/unknown types
-        return {"type": "string"}
+    # Skip 'self' or 'cls' for class methods
+    params = [(param_name, param) for param_name, param in sig.parameters.items() if param_name not in ('self', 'cls')]
+    # Tools without parameters (e.g. get_current_time()) need no annotation work at all
+    type_hints = {}
+    if params:
+        # Annotations are used as written unless something needs resolving (PEP 563 strings,
+        # Annotated metadata), which is the only case that needs get_type_hints' full pass
+        type_hints = getattr(func, "__annotations__", None) or {}
+        if any(isinstance(hint, str) or get_origin(hint) is Annotated for hint in type_hints.values()):
+            type_hints = get_type_hints(func)
 
     # --- 3. Build Properties ---
-    for param_name, param in sig.parameters.items():
-        # Skip 'self' or 'cls' for class methods
-        if param_name in ('self', 'cls'):
-            continue
-            
-        # Get the Python type (default to str if not annotated)
-        param_type = type_hints.get(param_name, str)
-        
-        # Generate schema for this field
-        field_schema = python_type_to_json_schema(param_type)
-        
-        # Add description if parsed (Optional: You could use a docstring parser here)
-        # For this simple example, we don't extract per-param descriptions from docstrings
-        # as that requires complex regex depending on docstring style (Google/NumPy/Sphinx).
-        
-        properties[param_name] = field_schema
-
-        # Determine if required (no default value = required)
-        if param.default is inspect.Parameter.empty:
-            required_fields.append(param_name)
+    # Unannotated parameters default to str. Schemas are deep-copied, nested "items" included,
+    # so the cached ones never end up shared between tool definitions
+    properties = {param_name: copy.deepcopy(_type_schema(type_hints.get(param_name, str))) for param_name, _ in params}
+    # Add description if parsed (Optional: You could use a docstring parser here)
+    # For this simple example, we don't extract per-param descriptions from docstrings
+    # as that requires complex regex depending on docstring style (Google/NumPy/Sphinx).
+    # Parameters without a default value are required
+    required_fields = [param_name for param_name, param in params if param.default is inspect.Parameter.empty]
 
     # --- 4. Construct the MCP Tool Definition ---
     wrapper.tool_def = {
@@ -85,147 +105,338 @@ def stark_tool(func):
         }
     }
     
-    # helper method to get the JSON easily
-    wrapper.get_json_schema = lambda: json.dumps(wrapper.tool_def, indent=2)
+    # helper method to get the JSON easily, serialized on first use and reused afterwards
+    wrapper.get_json_schema = functools.cache(lambda: json_dumps(wrapper.tool_def, indent=True))
 
     return wrapper
 
+class ToolRouter:
+    """
+    Maps every tool name the LLM can call to the manager that executes it,
+    so dispatching a tool call is a single dict lookup.
+    """
+    __slots__ = ("routes",)
+    MCP = "mcp"
+    FUNCTION = "function"
+    SUB_AGENT = "sub_agent"
+    # Name registered by more than one manager, it is never executed
+    COLLISION = "collision"
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, kind: str, tool_names, invoke: Optional[Callable] = None):
+        for tool_name in tool_names:
+            if tool_name in self.routes:
+                # The reply is stored with the route, so dispatch stays a single lookup
+                self.routes[tool_name] = {
+                    "kind": ToolRouter.COLLISION,
+                    "message": f"Tool name ({tool_name}) didn't execute because same tool exist in one of the MCP servers and in one of the function tools"
+                }
+                continue
+            route = {"kind": kind}
+            if invoke is not None:
+                route["invoke"] = functools.partial(invoke, tool_name)
+            self.routes[tool_name] = route
+
+    def get(self, tool_name: str) -> Optional[Dict[str, Any]]:
+        return self.routes.get(tool_name)
+
+# Provider-native web search tool, per provider that has one
+_WEB_SEARCH_TOOLS: Dict[str, Dict[str, Any]] = {
+    OPENAI: {"type": "web_search_preview"},
+    ANTHROPIC: {"type": "web_search_20250305", "name": "web_search", "max_uses": 5},
+}
+
 class Tool:
+    __slots__ = (
+        "runner", "mcp_manager", "ft_manager", "sub_agent_manager",
+        "router", "tools", "_tools_payload", "sub_agents_response",
+    )
+    # Tool arguments longer than this many characters are parsed in a worker thread
+    THREADED_PARSE_SIZE: int = 65536
+
     def __init__(self, runner):
         self.runner = runner
         self.mcp_manager = None
         self.ft_manager = None
         self.sub_agent_manager = None
+        self.router = ToolRouter()
         self.tools = []
+        self._tools_payload: Optional[str] = None
         self.sub_agents_response = {}
 
     async def init_tools(self, agent: Agent):
-        mcp_servers = agent.get_mcp_servers()
-        function_tools = agent.get_function_tools()
-        sub_agents = agent.get_sub_agents()
-        enable_web_search = agent.get_enable_web_search()
-        if mcp_servers:
+        mcp_servers = agent.mcp_servers
+        function_tools = agent.function_tools
+        sub_agents = agent.sub_agents
+        enable_web_search = agent.enable_web_search
+        llm_provider = agent.llm_provider
+        # Function tool schemas are collected in a worker thread while the MCP servers start.
+        # MCP init stays in this task: its sessions must be closed from the task that opened them
+        ft_future = asyncio.ensure_future(asyncio.to_thread(FunctionToolManager, function_tools)) if function_tools else None
+        try:
             self.mcp_manager = await MCPManager.init(mcp_servers)
-            self.tools = self.tools + self.mcp_manager.get_tools()
-        if function_tools:
-            self.ft_manager = FunctionToolManager(function_tools)
-            self.tools = self.tools + self.ft_manager.get_tools()
+        except BaseException:
+            if ft_future:
+                # The MCP error is the one raised, a failed function tool load must not replace it
+                await asyncio.gather(ft_future, return_exceptions=True)
+            raise
+        if ft_future:
+            self.ft_manager = await ft_future
+        if self.mcp_manager:
+            self.router.add(ToolRouter.MCP, self.mcp_manager.tool_to_server, self.mcp_manager.call_tool)
+        if self.ft_manager:
+            self.router.add(ToolRouter.FUNCTION, self.ft_manager.func_name_map, self.ft_manager.call_tool_async)
         if sub_agents:
             self.sub_agent_manager = SubAgentManager(sub_agents)
-            self.tools = self.tools + self.sub_agent_manager.get_agents_as_tools()
-        if enable_web_search:
-            if agent.get_llm_provider() == OPENAI:
-                self.tools.append({"type": "web_search_preview"})
-            elif agent.get_llm_provider() == ANTHROPIC:
-                self.tools.append({"type": "web_search_20250305", "name": "web_search", "max_uses": 5})
+            # Sub-agent calls are batched per turn in `__schedule`, the route only marks the name
+            self.router.add(ToolRouter.SUB_AGENT, self.sub_agent_manager.agent_name_map)
+        self.tools = [
+            *(self.mcp_manager.get_tools() if self.mcp_manager else ()),
+            *(self.ft_manager.get_tools() if self.ft_manager else ()),
+            *(self.sub_agent_manager.get_agents_as_tools() if self.sub_agent_manager else ()),
+        ]
+        # Stable ordering keeps the tools part of the prompt prefix byte-identical between runs
+        self.tools.sort(key=lambda tool: tool["function"]["name"])
+        if self.tools and llm_provider == ANTHROPIC:
+            # Cache breakpoint on the last tool definition, Anthropic then caches the whole tools block
+            self.tools[-1] = {**self.tools[-1], "cache_control": {"type": "ephemeral"}}
+        if enable_web_search and llm_provider in _WEB_SEARCH_TOOLS:
+            # Copied so the shared definition can't be changed through this agent's tool list
+            self.tools.append(dict(_WEB_SEARCH_TOOLS[llm_provider]))
         return self
 
     def get_tools(self) -> List[Dict]:
         return self.tools
 
+    def get_tools_payload(self) -> str:
+        # Tool schemas are static for the whole run, serialize them once instead of per LLM call
+        if self._tools_payload is None:
+            self._tools_payload = json_dumps(self.tools, sort_keys=True)
+        return self._tools_payload
+
     async def close_mcp_manager(self):
-        if self.mcp_manager:
-            await self.mcp_manager.close_all_sessions()
+        # Sessions are closed at most once, later calls are no-ops
+        mcp_manager, self.mcp_manager = self.mcp_manager, None
+        if mcp_manager:
+            await mcp_manager.close_all_sessions()
     
     def get_sub_agents_response(self) -> Dict:
         return self.sub_agents_response
     
     async def tool_calls(
         self, ai_tool_calls,
-        messages: List[Dict[str, Any]] = [{}]
-    ) -> List[ToolCallResponse]:
-        tool_responses: List[ToolCallResponse] = []
-        for ai_tool_call in ai_tool_calls:
-            tool_responses.append(await self.__call(ai_tool_call, messages))
-        return tool_responses
+        messages: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[ToolCallResponse]]:
+        """
+        Executes the tool calls of one turn. Returns the tool messages for the
+        conversation history and the matching responses for stream events.
+        """
+        tool_responses, pending = self.__schedule(ai_tool_calls, messages)
+        # Tool calls of one turn are independent, so they overlap instead of running back to back.
+        # A failing call answers with an error message, it never cancels its siblings
+        for index, tool_response in await asyncio.gather(*pending):
+            tool_responses[index] = tool_response
+        return [tool_response.to_message() for tool_response in tool_responses], tool_responses
+
+    async def tool_calls_stream(
+        self, ai_tool_calls,
+        messages: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Tuple[int, ToolCallResponse]]:
+        """
+        Same as `tool_calls`, but yields `(index, response)` as each call
+        finishes, `index` being the call's position in `ai_tool_calls`.
+        """
+        tool_responses, pending = self.__schedule(ai_tool_calls, messages)
+        # Scheduled before the first yield, so a consumer that stops early still gets them cancelled
+        tasks = [asyncio.ensure_future(awaitable) for awaitable in pending]
+        try:
+            for index, tool_response in enumerate(tool_responses):
+                if tool_response is not None:
+                    yield index, tool_response
+
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # A failing call (or a consumer that stops early) must not leave siblings running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def __schedule(
+        self, ai_tool_calls, messages: Optional[List[Dict[str, Any]]]
+    ) -> Tuple[List[Optional[ToolCallResponse]], List[Awaitable[Tuple[int, ToolCallResponse]]]]:
+        # Cache hits are answered right away, every other call becomes an awaitable of (index, response)
+        if messages is None:
+            messages = []
+        tool_responses: List[Optional[ToolCallResponse]] = [None] * len(ai_tool_calls)
+        tool_ttls = self.runner.agent.tool_ttls
+        pending = []
+        sub_agent_calls = []
+        for index, ai_tool_call in enumerate(ai_tool_calls):
+            tool_name = ai_tool_call["function"]["name"]
+            route = self.router.get(tool_name)
+            if route and route["kind"] == ToolRouter.SUB_AGENT:
+                sub_agent_calls.append((index, ai_tool_call))
+                continue
+
+            cache_key = None
+            if tool_name in tool_ttls:
+                cache_key = ToolResultCache.make_key(tool_name, ai_tool_call["function"]["arguments"])
+                content = self.runner.tool_cache.get(cache_key, tool_ttls[tool_name])
+                if content is not None:
+                    logger.info("🔧 Tool %s served from cache", tool_name)
+                    tool_responses[index] = ToolCallResponse(role="tool", tool_call_id=ai_tool_call["id"], content=content)
+                    continue
+            pending.append(self.__tool_call(index, ai_tool_call, messages, cache_key))
+
+        # Sub-agents are independent LLM loops, they run alongside the tools
+        if sub_agent_calls:
+            runs = self.sub_agent_manager.batch_runs(
+                self.runner, [ai_tool_call["function"]["name"] for _, ai_tool_call in sub_agent_calls], messages
+            )
+            for (index, ai_tool_call), run in zip(sub_agent_calls, runs):
+                pending.append(self.__sub_agent_call(index, ai_tool_call, run))
+        return tool_responses, pending
+
+    async def __tool_call(
+        self, index: int, ai_tool_call: Dict, messages: List[Dict[str, Any]], cache_key: Optional[str]
+    ) -> Tuple[int, ToolCallResponse]:
+        try:
+            tool_response, failed = await self.__bounded(self.__call(ai_tool_call, messages))
+        except Exception as e:
+            logger.error("Tool %s raised exception: %s", ai_tool_call["function"]["name"], e)
+            tool_response = ToolCallResponse(role="tool", tool_call_id=ai_tool_call["id"], content=json_dumps({"error": str(e)}))
+            failed = True
+        # Failed calls are not cached, the next call should retry
+        if cache_key and not failed:
+            self.runner.tool_cache.set(cache_key, tool_response.content)
+        return index, tool_response
+
+    async def __sub_agent_call(self, index: int, ai_tool_call: Dict, run: Awaitable[RunResponse]) -> Tuple[int, ToolCallResponse]:
+        # A failing sub-agent answers with an error message instead of failing its siblings.
+        # Sub-agents count against the same concurrency bound as the tools
+        try:
+            result = await self.__bounded(run)
+        except Exception as e:
+            result = e
+        return index, self.__sub_agent_response(ai_tool_call, result)
+
+    async def __bounded(self, coro):
+        semaphore: Optional[asyncio.Semaphore] = self.runner.tool_semaphore
+        if semaphore is None:
+            return await coro
+        async with semaphore:
+            return await coro
+
+    def __sub_agent_response(self, ai_tool_call: Dict, result: RunResponse | BaseException) -> ToolCallResponse:
+        tool_name: str = ai_tool_call["function"]["name"]
+        tool_call_id = ai_tool_call["id"]
+
+        if isinstance(result, BaseException):
+            logger.error("Sub-Agent %s raised exception: %s", tool_name, result)
+            return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=json_dumps({"error": str(result)}))
+
+        # The display name is the sub-agent's own name, no prefix stripping per call
+        self.sub_agents_response[self.sub_agent_manager.agent_name_map[tool_name].name] = result.sub_agent_result
+        if result.sub_agent_result:
+            tool_result = result.sub_agent_result[-1]
+            if isinstance(tool_result, dict) and "content" in tool_result:
+                tool_result = tool_result["content"]
+        else:
+            tool_result = "Sub-Agent executed successfully (no output returned)"
+
+        logger.info("%s", tool_result)
+        if not isinstance(tool_result, str):
+            tool_result = str(tool_result)
+
+        return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=tool_result)
 
     async def __call(
         self, ai_tool_call: Dict,
-        messages: List[Dict[str, Any]] = [{}]
-    ) -> ToolCallResponse:
+        messages: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[ToolCallResponse, bool]:
+        """Runs one tool call. Returns the response and whether the call failed."""
         tool_name: str = ai_tool_call["function"]["name"]
         tool_call_id = ai_tool_call["id"]
         tool_result = None
+        failed = False
+
+        route = self.router.get(tool_name)
+        kind = route["kind"] if route else None
+        if kind == ToolRouter.COLLISION:
+            return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=route["message"]), True
 
+        raw_arguments = ai_tool_call["function"]["arguments"]
         try:
-            arguments = json.loads(ai_tool_call["function"]["arguments"])
+            if len(raw_arguments) > self.THREADED_PARSE_SIZE:
+                # Parsing a payload this size would stall the other tool calls sharing the loop
+                arguments = await asyncio.to_thread(json_loads, raw_arguments)
+            else:
+                arguments = json_loads(raw_arguments)
         except json.JSONDecodeError as e:
-            logging.error(f"Failed to parse arguments for {tool_name}: {e}")
+            logger.error("Failed to parse arguments for %s: %s", tool_name, e)
             arguments = {}
 
-        if (self.mcp_manager and self.mcp_manager.is_mcp_tool(tool_name)) and (self.ft_manager and self.ft_manager.is_function_tool(tool_name)):
-            tool_result = f"Tool name ({tool_name}) didn't execute because same tool exist in one of the MCP servers and in one of the function tools"
-            return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=tool_result)
+        # Arguments can be several KB, they are only formatted when INFO is actually emitted
+        logger.info("🔧 Tool request: %s", tool_call_id)
+        logger.info("🔧 Tool name: %s", tool_name)
+        logger.info("🔧 Tool Args: %s", arguments)
 
-        logging.info(f"🔧 Tool request: {tool_call_id}")
-        logging.info(f"🔧 Tool name: {tool_name}")
-        logging.info(f"🔧 Tool Args: {arguments}")
-
-        if self.mcp_manager and self.mcp_manager.is_mcp_tool(tool_name):
+        if kind == ToolRouter.MCP:
             try:
                 tool_error = None
-                result = await self.mcp_manager.call_tool(tool_name, arguments)
+                result = await route["invoke"](arguments)
+                failed = bool(getattr(result, "isError", False))
 
                 if result.content:
-                    if hasattr(result.content[0], "text"):
-                        tool_result = result.content[0].text
-                    elif hasattr(result.content[0], "data"):
-                        tool_result = str(result.content[0].data)
+                    first_content = result.content[0]
+                    text = getattr(first_content, "text", None)
+                    if text is not None:
+                        tool_result = text
                     else:
-                        tool_result = str(result.content[0])
+                        data = getattr(first_content, "data", None)
+                        tool_result = str(data) if data is not None else str(first_content)
                 else:
                     tool_result = ""
                 
                 # Check if result is an error from wrong server
                 if tool_result and "Unknown tool:" in tool_result:
-                    logging.warning(
-                        f"Tool {tool_name} not available"
-                        f"trying next server"
-                    )
+                    logger.warning("Tool %s not available, trying next server", tool_name)
 
-                logging.info(f"Tool {tool_name} result length: {len(tool_result)} chars")
+                # Diagnostics only, not computed unless INFO is actually emitted
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Tool %s result length: %d chars", tool_name, len(tool_result))
             except Exception as e:
                 tool_error = str(e)
-                logging.info(
-                    f"Tool {tool_name} raised exception: {e}"
-                )
-
-            # Ensure tool_result is never empty
-            if tool_result is None or (isinstance(tool_result, str) and not tool_result.strip()):
-                if tool_result is None:
-                    error_msg = (
-                        f"Tool {tool_name} not found"
-                        if not tool_error
-                        else f"Tool error: {tool_error}"
-                    )
-                    logging.error(f"Failed to execute {tool_name}: {error_msg}")
-                    tool_result = json.dumps({"error": error_msg})
-                else:
-                    # Empty result - provide a default message
-                    tool_result = "Tool executed successfully (no output returned)"
-                    logging.warning(f"Tool {tool_name} returned empty result")
+                logger.info("Tool %s raised exception: %s", tool_name, e)
 
-            tool_result = tool_result if isinstance(tool_result, str) else json.dumps(tool_result)
-            if not tool_result.strip():
+            # Ensure tool_result is never empty. It is a str or None here, so one check per case;
+            # isspace() answers without copying the result like strip() would
+            if tool_result is None:
+                error_msg = (
+                    f"Tool {tool_name} not found"
+                    if not tool_error
+                    else f"Tool error: {tool_error}"
+                )
+                logger.error("Failed to execute %s: %s", tool_name, error_msg)
+                tool_result = json_dumps({"error": error_msg})
+                failed = True
+            elif not tool_result or tool_result.isspace():
+                # Empty result - provide a default message
                 tool_result = "Tool executed successfully (no output returned)"
+                logger.warning("Tool %s returned empty result", tool_name)
 
-        if self.ft_manager and self.ft_manager.is_function_tool(tool_name):
-            tool_result = self.ft_manager.call_tool(tool_name, arguments)
+        elif kind == ToolRouter.FUNCTION:
+            tool_result = await route["invoke"](arguments)
             if not isinstance(tool_result, str):
                 tool_result = str(tool_result)
 
-        if self.sub_agent_manager and self.sub_agent_manager.is_agent(tool_name):
-            tool_result: RunResponse = await self.sub_agent_manager.execute(self.runner, tool_name, messages)
-            self.sub_agents_response.update({tool_name.removeprefix("sub_agent__"): tool_result.sub_agent_result})
-            if tool_result.sub_agent_result:
-                tool_result = tool_result.sub_agent_result[-1]
-                if isinstance(tool_result, dict) and "content" in tool_result:
-                    tool_result = tool_result["content"]
-            else:
-                tool_result = "Sub-Agent executed successfully (no output returned)"
-            
-            logging.info(tool_result)
-            if not isinstance(tool_result, str):
-                tool_result = str(tool_result)
+        else:
+            # The model asked for a tool nobody registered, the tool message still needs content
+            logger.error("Tool %s not found", tool_name)
+            tool_result = json_dumps({"error": f"Tool {tool_name} not found"})
+            failed = True
 
-        return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=tool_result)
+        return ToolCallResponse(role="tool", tool_call_id=tool_call_id, content=tool_result), failed
@@ -1,18 +1,76 @@
 import os
+import asyncio
+import errno
+import locale
+import mmap
+import stat
 import subprocess
 import shutil
 import difflib
+import fnmatch
+import functools
+import hashlib
+import io
+import re
+import signal
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Deque
 from ..tool import stark_tool
 
 
+def _hunk_range(start: int, stop: int) -> str:
+    """Line range of a unified diff hunk header, as `diff -u` prints it."""
+    length = stop - start
+    if length == 1:
+        return str(start + 1)
+    # An empty range points at the line before it
+    return f"{start + 1 if length else start},{length}"
+
+
+def _exclusive(method):
+    """Run the method holding the instance's operation lock, see `Coding._op_lock`."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._op_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class Coding:
     """
     Comprehensive coding tools for AI agents with diff mechanisms and user approval flows.
     Provides file/folder operations, shell execution, and content management with safety checks.
     """
 
+    # Contents larger than this (characters) are diffed by the system `diff`, difflib is
+    # quadratic in the worst case and dominates the approval flow on big files
+    NATIVE_DIFF_SIZE: int = 50_000
+    # Recently generated diffs kept per instance
+    DIFF_CACHE_SIZE: int = 8
+    # Overwrites larger than this (characters, both sides together) only show a summary diff
+    # of the first and last SUMMARY_DIFF_LINES lines
+    SUMMARY_DIFF_SIZE: int = 256 * 1024
+    SUMMARY_DIFF_LINES: int = 100
+    # Files at least this large (bytes) are decoded straight from a read-only memory map
+    MMAP_READ_SIZE: int = 1 << 20
+    # Resolved paths kept per instance
+    PATH_CACHE_SIZE: int = 4096
+    # File contents kept per instance, and the largest file (bytes) that is cached
+    READ_CACHE_SIZE: int = 64
+    READ_CACHE_ENTRY_SIZE: int = 1 << 20
+    # Directory entries counted for a delete approval before the count gives up
+    COUNT_TREE_CAP: int = 10_000
+    # Most recent operations kept in operation_history
+    HISTORY_SIZE: int = 10_000
+    # Threads copying or deleting the files of a tree, used once a tree has at least
+    # PARALLEL_TREE_FILES files. The work is syscall-bound and releases the GIL
+    TREE_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
+    PARALLEL_TREE_FILES: int = 16
+
     def __init__(self, auto_approve: bool = False, workspace_dir: Optional[str] = None):
         """
         Initialize Coding tools.
@@ -23,14 +81,84 @@ class Coding:
         """
         self.auto_approve = auto_approve
         self.workspace_dir = Path(workspace_dir) if workspace_dir else Path.cwd()
-        self.operation_history: List[Dict[str, Any]] = []
+        self.operation_history: Deque[Dict[str, Any]] = deque(maxlen=self.HISTORY_SIZE)
+        self._diff_cache: OrderedDict[Tuple[int, int, int, int, str], str] = OrderedDict()
+        self._path_cache: Dict[str, Path] = {}
+        # Sync tools of one turn run concurrently in executor threads. File operations that change
+        # the workspace and approval prompts hold this lock, so read-modify-writes can't
+        # interleave and each prompt gets its own answer. Shell commands only hold it while
+        # prompting, the command itself runs unlocked. Re-entrant for nested helpers
+        self._op_lock = threading.RLock()
+        self._read_cache: OrderedDict[Path, Tuple[Tuple[int, int, int, str], str]] = OrderedDict()
+        # Sync tools run in executor threads, several calls can touch the LRUs at once
+        self._cache_lock = threading.Lock()
 
     def _get_full_path(self, path: str) -> Path:
         """Convert relative path to absolute path within workspace."""
+        # resolve() walks every path component, agents keep coming back to the same paths
+        cached = self._path_cache.get(path)
+        if cached is not None:
+            return cached
         full_path = Path(path)
         if not full_path.is_absolute():
             full_path = self.workspace_dir / path
-        return full_path.resolve()
+        full_path = full_path.resolve()
+        if len(self._path_cache) >= self.PATH_CACHE_SIZE:
+            self._path_cache.clear()
+        self._path_cache[path] = full_path
+        return full_path
+
+    def _forget_paths(self):
+        """Drop cached path resolutions and file contents, called after operations that can change the tree."""
+        self._path_cache.clear()
+        with self._cache_lock:
+            self._read_cache.clear()
+
+    def _read_text(self, full_path: Path, encoding: str = 'utf-8', st: Optional[os.stat_result] = None) -> str:
+        """
+        Read a whole text file, with the same newline translation as open(..., 'r').
+        The bytes are decoded in one go instead of through a TextIOWrapper.
+        Unchanged files are served from the read cache; `st` is the file's stat if the caller has it.
+        """
+        if st is None:
+            st = os.stat(full_path)
+        # A rewrite changes mtime or size, replacing the file changes the inode
+        key = (st.st_mtime_ns, st.st_size, st.st_ino, encoding)
+        with self._cache_lock:
+            cached = self._read_cache.get(full_path)
+            if cached is not None and cached[0] == key:
+                self._read_cache.move_to_end(full_path)
+                return cached[1]
+
+        fd = os.open(full_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            size = st.st_size
+            if size >= self.MMAP_READ_SIZE:
+                # Decoding from the mapping skips the intermediate bytes copy
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    content = str(mapped, encoding)
+            else:
+                # Sized reads until EOF, st_size can be 0 or stale for special files
+                chunks = []
+                while True:
+                    chunk = os.read(fd, max(size, 65536))
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                content = b"".join(chunks).decode(encoding)
+        finally:
+            os.close(fd)
+
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+
+        # Empty st_size means a special file (e.g. /proc) whose content changes without its stat
+        if 0 < st.st_size <= self.READ_CACHE_ENTRY_SIZE:
+            with self._cache_lock:
+                self._read_cache[full_path] = (key, content)
+                while len(self._read_cache) > self.READ_CACHE_SIZE:
+                    self._read_cache.popitem(last=False)
+        return content
 
     def _request_approval(self, operation: str, details: str) -> bool:
         """
@@ -46,6 +174,10 @@ class Coding:
         if self.auto_approve:
             return True
         
+        with self._op_lock:
+            return self._prompt_approval(operation, details)
+
+    def _prompt_approval(self, operation: str, details: str) -> bool:
         print(f"\n{'='*60}")
         print(f"APPROVAL REQUIRED: {operation}")
         print(f"{'='*60}")
@@ -72,6 +204,33 @@ class Coding:
             "details": details
         })
 
+    def _replace_file(self, full_path: Path, content: str):
+        """
+        Write content to a temp file next to full_path and rename it over the original,
+        so readers and crashes only ever see the old or the new file.
+        """
+        if os.linesep != '\n':
+            # Same newline translation as a text-mode write
+            content = content.replace('\n', os.linesep)
+        data = memoryview(content.encode('utf-8'))
+        mode = stat.S_IMODE(full_path.stat().st_mode)
+
+        fd, tmp_path = tempfile.mkstemp(dir=full_path.parent, prefix=f".{full_path.name}.", suffix=".tmp")
+        try:
+            try:
+                os.chmod(tmp_path, mode)
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
     def _generate_diff(self, original: str, modified: str, filepath: str = "file") -> str:
         """
         Generate unified diff between original and modified content.
@@ -81,24 +240,220 @@ class Coding:
             modified: Modified content
             filepath: File path for diff header
             
+        Returns:
+            Unified diff string
+        """
+        key = (len(original), hash(original), len(modified), hash(modified), filepath)
+        with self._cache_lock:
+            cached = self._diff_cache.get(key)
+            if cached is not None:
+                self._diff_cache.move_to_end(key)
+                return cached
+
+        diff = None
+        if max(len(original), len(modified)) > self.NATIVE_DIFF_SIZE:
+            diff = self._native_diff(original, modified, filepath)
+
+        if diff is None:
+            diff = self._unified_diff(original, modified, filepath)
+
+        with self._cache_lock:
+            self._diff_cache[key] = diff
+            while len(self._diff_cache) > self.DIFF_CACHE_SIZE:
+                self._diff_cache.popitem(last=False)
+        return diff
+
+    def _summary_diff(self, original: str, modified: str, filepath: str) -> str:
+        """
+        Sizes and hashes of both contents plus diffs of their first and last lines,
+        for contents too large to show in full.
+        
+        Returns:
+            Summary diff string
+        """
+        n = self.SUMMARY_DIFF_LINES
+        # Bounds the slices for files with very long lines
+        chars = self.SUMMARY_DIFF_SIZE // 4
+
+        def head(text: str) -> str:
+            text = text[:chars]
+            end = -1
+            for _ in range(n):
+                end = text.find('\n', end + 1)
+                if end == -1:
+                    return text
+            return text[:end + 1]
+
+        def tail(text: str) -> str:
+            text = text[-chars:]
+            # A trailing newline ends the last line, it doesn't start one
+            end = len(text) - 1 if text.endswith('\n') else len(text)
+            for _ in range(n):
+                end = text.rfind('\n', 0, end)
+                if end == -1:
+                    return text
+            return text[end + 1:]
+
+        def digest(text: str) -> str:
+            return hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+        return (
+            f"Content too large for a full diff, only the first and last {n} lines are compared\n"
+            f"Original: {len(original)} characters, sha256 {digest(original)}\n"
+            f"Modified: {len(modified)} characters, sha256 {digest(modified)}\n"
+            f"\nFirst {n} lines:\n{self._unified_diff(head(original), head(modified), filepath) or '(unchanged)'}"
+            f"\nLast {n} lines:\n{self._unified_diff(tail(original), tail(modified), filepath) or '(unchanged)'}"
+        )
+
+    def _unified_diff(self, original: str, modified: str, filepath: str, context: int = 3) -> str:
+        """
+        Unified diff computed by difflib, in the same format as the system `diff -u`.
+        
         Returns:
             Unified diff string
         """
         original_lines = original.splitlines(keepends=True)
         modified_lines = modified.splitlines(keepends=True)
+
+        # Equal lines share one int id, so the matcher hashes and compares ints, not lines
+        ids: Dict[str, int] = {}
+        a = [ids.setdefault(line, len(ids)) for line in original_lines]
+        b = [ids.setdefault(line, len(ids)) for line in modified_lines]
+
+        def emit(prefix: str, lines: List[str], start: int, stop: int):
+            for i in range(start, stop):
+                line = lines[i]
+                out.append(prefix)
+                out.append(line)
+                if i == len(lines) - 1 and line.splitlines()[0] == line:
+                    out.append("\n\\ No newline at end of file\n")
+
+        out: List[str] = []
+        for group in difflib.SequenceMatcher(None, a, b).get_grouped_opcodes(context):
+            if not out:
+                out.append(f"--- a/{filepath}\n+++ b/{filepath}\n")
+            first, last = group[0], group[-1]
+            out.append(f"@@ -{_hunk_range(first[1], last[2])} +{_hunk_range(first[3], last[4])} @@\n")
+            for tag, i1, i2, j1, j2 in group:
+                if tag == 'equal':
+                    emit(" ", original_lines, i1, i2)
+                    continue
+                if tag in ('replace', 'delete'):
+                    emit("-", original_lines, i1, i2)
+                if tag in ('replace', 'insert'):
+                    emit("+", modified_lines, j1, j2)
+        return ''.join(out)
+
+    def _native_diff(self, original: str, modified: str, filepath: str) -> Optional[str]:
+        """
+        Unified diff computed by the system `diff` command.
         
-        diff = difflib.unified_diff(
-            original_lines,
-            modified_lines,
-            fromfile=f"a/{filepath}",
-            tofile=f"b/{filepath}",
-            lineterm=''
-        )
+        Returns:
+            Unified diff string, or None when `diff` is unavailable or failed
+        """
+        diff_cmd = shutil.which("diff")
+        if not diff_cmd:
+            return None
+
+        # The original goes through a temp file, the modified content through stdin
+        fd, original_path = tempfile.mkstemp(prefix="stark-diff-")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(original)
+            result = subprocess.run(
+                [diff_cmd, "-u", "-L", f"a/{filepath}", "-L", f"b/{filepath}", original_path, "-"],
+                input=modified.encode('utf-8'),
+                capture_output=True
+            )
+        except (OSError, ValueError):
+            return None
+        finally:
+            try:
+                os.unlink(original_path)
+            except OSError:
+                pass
+
+        # Exit status 0 means identical, 1 means different, anything else is an error
+        if result.returncode > 1:
+            return None
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def _replace(self, content: str, search: str, replace: str, count: int = -1) -> Tuple[str, int]:
+        """
+        Replace occurrences of search in a single pass over content.
+        
+        Returns:
+            Tuple of (new content, number of replacements)
+        """
+        if not search:
+            # An empty needle matches between every character, keep str.replace semantics
+            occurrences = len(content) + 1 if count < 0 else min(count, len(content) + 1)
+            return content.replace(search, replace, count), occurrences
+
+        parts = []
+        start = 0
+        occurrences = 0
+        while count < 0 or occurrences < count:
+            index = content.find(search, start)
+            if index == -1:
+                break
+            parts.append(content[start:index])
+            start = index + len(search)
+            occurrences += 1
+        if not occurrences:
+            return content, 0
+        parts.append(content[start:])
+        return replace.join(parts), occurrences
+
+    def _list_entries(self, root: Path, pattern: str, recursive: bool) -> List[Tuple[str, bool, Optional[int]]]:
+        """
+        Entries of root matching pattern, in the order sorted(Path.glob/rglob) gives.
         
-        return ''.join(diff)
+        Returns:
+            List of (relative path, is directory, size for files else None)
+        """
+        if "/" in pattern or os.sep in pattern or "**" in pattern:
+            # Patterns spanning directories keep pathlib's matching
+            items = sorted(root.rglob(pattern) if recursive else root.glob(pattern))
+            return [
+                (str(item.relative_to(root)), item.is_dir(), item.stat().st_size if item.is_file() else None)
+                for item in items
+            ]
+
+        # Single-component patterns are matched against entry names while scanning:
+        # DirEntry caches the type and stat results, so each entry costs at most one stat call
+        match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        entries = []
+        pending = [((), str(root))]
+        while pending:
+            parts, dir_path = pending.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        entry_parts = parts + (entry.name,)
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if match(os.path.normcase(entry.name)):
+                            entries.append((entry_parts, entry, is_dir))
+                        # Like rglob, symlinked directories are not descended into
+                        if recursive and is_dir and not entry.is_symlink():
+                            pending.append((entry_parts, entry.path))
+            except OSError:
+                # Unreadable subdirectories are skipped, as glob does
+                if not parts:
+                    raise
+
+        # Path ordering compares path components, not the joined string
+        entries.sort(key=lambda item: tuple(os.path.normcase(part) for part in item[0]))
+        return [
+            (os.path.join(*parts), is_dir, entry.stat().st_size if entry.is_file() else None)
+            for parts, entry, is_dir in entries
+        ]
 
     @stark_tool
-    def shell_exec(self, cmd: str, dir_path: Optional[str] = None, timeout: int = 30) -> str:
+    async def shell_exec(self, cmd: str, dir_path: Optional[str] = None, timeout: int = 30) -> str:
         """
         Execute a shell command with user approval.
         
@@ -112,44 +467,73 @@ class Coding:
         """
         exec_dir = self._get_full_path(dir_path) if dir_path else self.workspace_dir
         
-        # Request approval
-        approval_details = f"""
-Command: {cmd}
-Working Directory: {exec_dir}
-Timeout: {timeout}s
-"""
+        # Request approval. The prompt blocks on input(), so it runs off the event loop
+        approval_details = self._shell_approval_details(cmd, exec_dir, timeout)
         
-        if not self._request_approval("SHELL EXECUTION", approval_details):
+        if not self.auto_approve and not await asyncio.to_thread(self._request_approval, "SHELL EXECUTION", approval_details):
             self._log_operation("shell_exec", str(exec_dir), "rejected", cmd)
             return "Operation rejected by user"
         
         try:
-            # Execute command
-            result = subprocess.run(
+            # Commands of one turn run as concurrent child processes, none of them holds a thread
+            process = await asyncio.create_subprocess_shell(
                 cmd,
-                shell=True,
                 cwd=str(exec_dir),
-                capture_output=True,
-                text=True,
-                timeout=timeout
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                # Own process group, so a timeout also stops what the shell started
+                start_new_session=os.name == 'posix'
             )
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                error_msg = f"Command timed out after {timeout} seconds"
+                self._log_operation("shell_exec", str(exec_dir), "timeout", cmd)
+                return error_msg
+            finally:
+                # Timed out or cancelled, the command doesn't outlive the call
+                if process.returncode is None:
+                    self._kill_process(process)
+                    await process.wait()
             
-            output = f"STDOUT:\n{result.stdout}\n\nSTDERR:\n{result.stderr}\n\nReturn Code: {result.returncode}"
+            output = f"STDOUT:\n{self._decode_output(stdout)}\n\nSTDERR:\n{self._decode_output(stderr)}\n\nReturn Code: {process.returncode}"
             
             self._log_operation("shell_exec", str(exec_dir), "success", cmd)
             return output
             
-        except subprocess.TimeoutExpired:
-            error_msg = f"Command timed out after {timeout} seconds"
-            self._log_operation("shell_exec", str(exec_dir), "timeout", cmd)
-            return error_msg
-            
         except Exception as e:
             error_msg = f"Error executing command: {str(e)}"
             self._log_operation("shell_exec", str(exec_dir), "error", error_msg)
             return error_msg
+        finally:
+            self._forget_paths()
+
+    def _shell_approval_details(self, cmd: str, exec_dir: Path, timeout: int) -> str:
+        return f"""
+Command: {cmd}
+Working Directory: {exec_dir}
+Timeout: {timeout}s
+"""
+
+    def _kill_process(self, process: asyncio.subprocess.Process):
+        """Kill a shell command with its children, they would otherwise keep the output pipes open."""
+        if os.name == 'posix':
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            except OSError:
+                pass
+        process.kill()
+
+    def _decode_output(self, data: bytes) -> str:
+        """Decode process output like subprocess.run(text=True) does."""
+        text = data.decode(locale.getpreferredencoding(False), errors='replace')
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
 
     @stark_tool
+    @_exclusive
     def write(self, path: str, content: str, create_dirs: bool = True) -> str:
         """
         Write content to a file with user approval.
@@ -168,9 +552,11 @@ Timeout: {timeout}s
         # Prepare approval details
         if file_exists:
             try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    original_content = f.read()
-                diff = self._generate_diff(original_content, content, str(path))
+                original_content = self._read_text(full_path)
+                if len(original_content) + len(content) > self.SUMMARY_DIFF_SIZE:
+                    diff = self._summary_diff(original_content, content, str(path))
+                else:
+                    diff = self._generate_diff(original_content, content, str(path))
                 approval_details = f"""
 File: {full_path}
 Action: OVERWRITE existing file
@@ -208,6 +594,8 @@ CONTENT PREVIEW (first 500 chars):
             # Write file
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            with self._cache_lock:
+                self._read_cache.pop(full_path, None)
             
             action = "overwritten" if file_exists else "created"
             self._log_operation("write", str(full_path), "success", f"File {action}")
@@ -233,14 +621,16 @@ CONTENT PREVIEW (first 500 chars):
         full_path = self._get_full_path(path)
         
         try:
-            if not full_path.exists():
+            # One stat answers both checks and keys the read cache
+            try:
+                st = full_path.stat()
+            except (FileNotFoundError, NotADirectoryError):
                 return f"Error: File does not exist: {full_path}"
             
-            if not full_path.is_file():
+            if not stat.S_ISREG(st.st_mode):
                 return f"Error: Path is not a file: {full_path}"
             
-            with open(full_path, 'r', encoding=encoding) as f:
-                content = f.read()
+            content = self._read_text(full_path, encoding, st)
             
             self._log_operation("read", str(full_path), "success")
             return content
@@ -251,6 +641,7 @@ CONTENT PREVIEW (first 500 chars):
             return error_msg
 
     @stark_tool
+    @_exclusive
     def delete(self, path: str, recursive: bool = False) -> str:
         """
         Delete a file or directory with user approval.
@@ -273,12 +664,12 @@ CONTENT PREVIEW (first 500 chars):
         # Prepare approval details
         if is_dir:
             try:
-                items = list(full_path.rglob('*')) if recursive else list(full_path.iterdir())
+                count, truncated = self._count_tree(full_path, recursive)
                 approval_details = f"""
 Path: {full_path}
 Type: Directory
 Recursive: {recursive}
-Items to delete: {len(items)}
+Items to delete: {f"more than {self.COUNT_TREE_CAP:,}" if truncated else count}
 
 WARNING: This will permanently delete the directory and its contents!
 """
@@ -304,7 +695,7 @@ WARNING: This will permanently delete the file!
         try:
             if is_dir:
                 if recursive:
-                    shutil.rmtree(full_path)
+                    self._remove_tree(full_path)
                 else:
                     full_path.rmdir()
             else:
@@ -317,8 +708,36 @@ WARNING: This will permanently delete the file!
             error_msg = f"Error deleting {item_type}: {str(e)}"
             self._log_operation("delete", str(full_path), "error", error_msg)
             return error_msg
+        finally:
+            self._forget_paths()
+
+    def _count_tree(self, root: Path, recursive: bool) -> Tuple[int, bool]:
+        """
+        Count the entries under root, stopping once there are more than COUNT_TREE_CAP.
+        
+        Returns:
+            Tuple of (count, whether the count stopped at the cap)
+        """
+        count = 0
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        count += 1
+                        if count > self.COUNT_TREE_CAP:
+                            return count, True
+                        if recursive and entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+            except OSError:
+                # Like rglob, unreadable subdirectories are skipped
+                if directory is root:
+                    raise
+        return count, False
 
     @stark_tool
+    @_exclusive
     def update(self, path: str, search: str, replace: str, count: int = -1) -> str:
         """
         Update file content by searching and replacing text with diff preview.
@@ -339,21 +758,17 @@ WARNING: This will permanently delete the file!
                 return f"Error: File does not exist: {full_path}"
             
             # Read original content
-            with open(full_path, 'r', encoding='utf-8') as f:
-                original_content = f.read()
+            original_content = self._read_text(full_path)
             
             # Perform replacement
-            modified_content = original_content.replace(search, replace, count)
+            modified_content, num_replacements = self._replace(original_content, search, replace, count)
             
-            if original_content == modified_content:
+            if num_replacements == 0 or search == replace:
                 return f"No changes: Search text not found in {full_path}"
             
             # Generate diff
             diff = self._generate_diff(original_content, modified_content, str(path))
             
-            # Count replacements
-            num_replacements = original_content.count(search) if count == -1 else min(count, original_content.count(search))
-            
             approval_details = f"""
 File: {full_path}
 Search: {repr(search)}
@@ -369,8 +784,9 @@ DIFF:
                 return "Operation rejected by user"
             
             # Write updated content
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(modified_content)
+            self._replace_file(full_path, modified_content)
+            with self._cache_lock:
+                self._read_cache.pop(full_path, None)
             
             self._log_operation("update", str(full_path), "success", f"{num_replacements} replacements")
             return f"Successfully updated {full_path}\nReplacements: {num_replacements}\n\nDIFF:\n{diff}"
@@ -381,6 +797,7 @@ DIFF:
             return error_msg
 
     @stark_tool
+    @_exclusive
     def create_directory(self, path: str, parents: bool = True) -> str:
         """
         Create a directory with user approval.
@@ -415,6 +832,8 @@ Create Parents: {parents}
             error_msg = f"Error creating directory: {str(e)}"
             self._log_operation("create_directory", str(full_path), "error", error_msg)
             return error_msg
+        finally:
+            self._forget_paths()
 
     @stark_tool
     def list_directory(self, path: str = ".", pattern: str = "*", recursive: bool = False) -> str:
@@ -439,10 +858,7 @@ Create Parents: {parents}
                 return f"Error: Path is not a directory: {full_path}"
             
             # Get items
-            if recursive:
-                items = sorted(full_path.rglob(pattern))
-            else:
-                items = sorted(full_path.glob(pattern))
+            items = self._list_entries(full_path, pattern, recursive)
             
             # Format output
             result = [f"Directory: {full_path}\n"]
@@ -450,10 +866,9 @@ Create Parents: {parents}
             result.append(f"Recursive: {recursive}")
             result.append(f"Total items: {len(items)}\n")
             
-            for item in items:
-                rel_path = item.relative_to(full_path)
-                item_type = "DIR " if item.is_dir() else "FILE"
-                size = f"{item.stat().st_size:>10}" if item.is_file() else " " * 10
+            for rel_path, is_dir, file_size in items:
+                item_type = "DIR " if is_dir else "FILE"
+                size = f"{file_size:>10}" if file_size is not None else " " * 10
                 result.append(f"{item_type} {size} {rel_path}")
             
             self._log_operation("list_directory", str(full_path), "success")
@@ -465,6 +880,7 @@ Create Parents: {parents}
             return error_msg
 
     @stark_tool
+    @_exclusive
     def move(self, source: str, destination: str) -> str:
         """
         Move or rename a file/directory with user approval.
@@ -504,8 +920,11 @@ Type: {"Directory" if src_path.is_dir() else "File"}
             error_msg = f"Error moving: {str(e)}"
             self._log_operation("move", str(src_path), "error", error_msg)
             return error_msg
+        finally:
+            self._forget_paths()
 
     @stark_tool
+    @_exclusive
     def copy(self, source: str, destination: str, recursive: bool = True) -> str:
         """
         Copy a file or directory with user approval.
@@ -544,12 +963,12 @@ Recursive: {recursive if is_dir else "N/A"}
             if is_dir:
                 if recursive:
                     if dst_path.exists():
-                        shutil.rmtree(dst_path)
-                    shutil.copytree(src_path, dst_path)
+                        self._remove_tree(dst_path)
+                    self._copy_tree(src_path, dst_path)
                 else:
                     return "Error: Source is a directory but recursive=False"
             else:
-                shutil.copy2(src_path, dst_path)
+                self._copy_file(src_path, dst_path)
             
             self._log_operation("copy", str(src_path), "success", f"Copied to {dst_path}")
             return f"Successfully copied {src_path} to {dst_path}"
@@ -558,6 +977,95 @@ Recursive: {recursive if is_dir else "N/A"}
             error_msg = f"Error copying: {str(e)}"
             self._log_operation("copy", str(src_path), "error", error_msg)
             return error_msg
+        finally:
+            self._forget_paths()
+
+    def _copy_file(self, src, dst):
+        """
+        Copy a file with its metadata like `shutil.copy2`, but through `os.copy_file_range`
+        so the kernel copies (or reflinks) the data without passing it through Python.
+        """
+        copy_file_range = getattr(os, "copy_file_range", None)
+        src_st = os.stat(src)
+        if copy_file_range is None or not stat.S_ISREG(src_st.st_mode) or not src_st.st_size:
+            # Empty-looking files may be virtual (e.g. /proc), leave those to shutil
+            return shutil.copy2(src, dst)
+
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                while copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+            except OSError as e:
+                # Unsupported by the kernel or across these filesystems
+                if e.errno not in (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                    raise
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                shutil.copyfileobj(fsrc, fdst)
+        shutil.copystat(src, dst)
+        return dst
+
+    def _each_file(self, fn, items: List):
+        """Apply fn to every item, over a thread pool for large trees. The first failure is raised."""
+        if len(items) < self.PARALLEL_TREE_FILES:
+            for item in items:
+                fn(item)
+            return
+        with ThreadPoolExecutor(max_workers=self.TREE_WORKERS) as pool:
+            for _ in pool.map(fn, items):
+                pass
+
+    def _copy_tree(self, src: Path, dst: Path):
+        """
+        `shutil.copytree` with the file copies spread over a thread pool. Directories are
+        created in a serial walk first and get their metadata once their contents are in.
+        """
+        dirs = []
+        files = []
+        pending = [(str(src), str(dst))]
+        while pending:
+            src_dir, dst_dir = pending.pop()
+            os.makedirs(dst_dir)
+            dirs.append((src_dir, dst_dir))
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    target = os.path.join(dst_dir, entry.name)
+                    # Symlinks are followed, as copytree does by default
+                    if entry.is_dir():
+                        pending.append((entry.path, target))
+                    else:
+                        files.append((entry.path, target))
+
+        self._each_file(lambda pair: self._copy_file(*pair), files)
+        # Children come after their parent in dirs, so parents are stamped last
+        for src_dir, dst_dir in reversed(dirs):
+            shutil.copystat(src_dir, dst_dir)
+
+    def _remove_tree(self, root: Path):
+        """`shutil.rmtree` with the files unlinked over a thread pool, then directories removed bottom-up."""
+        dirs = []
+        files = []
+        pending = [str(root)]
+        while pending:
+            directory = pending.pop()
+            dirs.append(directory)
+            with os.scandir(directory) as it:
+                for entry in it:
+                    # Symlinks are removed, never followed
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        files.append(entry.path)
+
+        self._each_file(os.unlink, files)
+        for directory in reversed(dirs):
+            os.rmdir(directory)
 
     @stark_tool
     def get_operation_history(self) -> str:
@@ -570,13 +1078,11 @@ Recursive: {recursive if is_dir else "N/A"}
         if not self.operation_history:
             return "No operations recorded yet."
         
-        result = ["Operation History:\n"]
+        result = io.StringIO()
+        result.write("Operation History:\n")
         for i, op in enumerate(self.operation_history, 1):
-            result.append(f"{i}. {op['operation'].upper()}")
-            result.append(f"   Path: {op['path']}")
-            result.append(f"   Status: {op['status']}")
+            result.write(f"\n{i}. {op['operation'].upper()}\n   Path: {op['path']}\n   Status: {op['status']}\n")
             if op['details']:
-                result.append(f"   Details: {op['details']}")
-            result.append("")
+                result.write(f"   Details: {op['details']}\n")
         
-        return "\n".join(result)
\ No newline at end of file
+        return result.getvalue()
\ No newline at end of file
@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from typing import List, Dict, Any
 from pydantic import BaseModel
 
@@ -12,21 +13,27 @@ class Stream:
     # Provider Stream
     CONTENT_CHUNK: str = "CONTENT_CHUNK"
     TOOL_CALLS: str = "TOOL_CALLS"
+    TOOL_CALL_START: str = "TOOL_CALL_START"
+    TOOL_CALL_DELTA: str = "TOOL_CALL_DELTA"
     PROVIDER_STREAM_COMPLETED: str = "PROVIDER_STREAM_COMPLETED"
 
     @classmethod
     def event(cls, type: str, data: Any, data_type: str = "none") -> 'Stream.Event':
-        return cls.Event(type=type, data=data, data_type=data_type)
+        return cls.Event(type, data, data_type)
 
-    class Event(BaseModel):
+    # Built once per streamed chunk from internal values, a slotted dataclass like ProviderResponse
+    @dataclass(slots=True)
+    class Event:
         type: str
         data: Any
         data_type: str = "none"
 
-class ProviderResponse(BaseModel):
-    content: str
-    tool_calls: List
-    message: Dict[str, Any]
+# Internal accumulator touched on every streamed chunk, kept as a slotted dataclass
+@dataclass(slots=True)
+class ProviderResponse:
+    content: str = ""
+    tool_calls: List = field(default_factory=list)
+    message: Dict[str, Any] = field(default_factory=dict)
 
 class RunResponse(BaseModel):
     result: List[Dict[str, Any]]
@@ -42,4 +49,9 @@ class IterationData(BaseModel):
 class ToolCallResponse(BaseModel):
     role: str
     tool_call_id: str
-    content: Any
\ No newline at end of file
+    # Always text, every tool path stringifies its result before building the response
+    content: str
+
+    def to_message(self) -> Dict[str, Any]:
+        # Plain field copy, what `model_dump()` would give without a pydantic-core pass
+        return {"role": self.role, "tool_call_id": self.tool_call_id, "content": self.content}
\ No newline at end of file
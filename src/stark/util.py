@@ -1,16 +1,86 @@
-import json, re
+import json, asyncio
+from typing import Any, AsyncIterator, TypeVar
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_loads(data: str | bytes) -> Any:
+    """`json.loads` backed by orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj: Any, sort_keys: bool = False, indent: bool = False) -> str:
+    """`json.dumps` backed by orjson when it is installed. `indent` pretty-prints with two spaces."""
+    if orjson is not None:
+        # Non-str keys are stringified like the stdlib does instead of raising
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0) | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, sort_keys=sort_keys, indent=2 if indent else None)
+
+T = TypeVar("T")
+_END = object()
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+async def buffered(source: AsyncIterator[T], maxsize: int = 32) -> AsyncIterator[T]:
+    """
+    Drains `source` into a bounded queue from a background task, so the
+    producer keeps reading while the consumer is busy with earlier items.
+    Exceptions raised by `source` are re-raised to the consumer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def fill():
+        try:
+            async for item in source:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(_Failure(e))
+            return
+        await queue.put(_END)
+
+    producer = asyncio.create_task(fill())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Consumer stopped early (break, error or aclose), don't leave the producer running
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
 
 class Util:
     
     @classmethod
     def load_json(cls, json_string):
-        # Cleaning Json String if there are back ticks or `json` keyword
-        cleaned_string = re.sub(r'^```*|```$', '', json_string.strip(), flags=re.MULTILINE)
-        cleaned_string = re.sub(r'^json*|$', '', cleaned_string.strip(), flags=re.MULTILINE)
+        # Cleaning Json String if there are back ticks or `json` keyword.
+        # Plain slicing of the surrounding fence, already-clean JSON passes straight through
+        cleaned_string = json_string.strip()
+        if cleaned_string.startswith("```"):
+            cleaned_string = cleaned_string.lstrip("`")
+        if cleaned_string.endswith("```"):
+            cleaned_string = cleaned_string[:-3]
         cleaned_string = cleaned_string.strip()
+        if cleaned_string.startswith("json"):
+            cleaned_string = cleaned_string[4:].strip()
         
         try:
             # Converting cleaned JSON string to python `dict`
-            return json.loads(cleaned_string)
+            return json_loads(cleaned_string)
         except json.JSONDecodeError as e:
             return f"Error parsing JSON: {e}"
\ No newline at end of file